@@ -0,0 +1,55 @@
+"""
+jm收藏夹并发加载性能测试
+使用模拟网络延迟的客户端, 统计N个用户同时打开收藏夹的耗时, 并检查结果没有串号
+
+用法: python benchmarks/favourite_load.py [用户数 ...]
+"""
+import asyncio
+import sys
+import time
+from types import SimpleNamespace
+
+from loader import load
+
+data_source = load("jmcomic_favourite.data_source")
+
+# 模拟的单次请求延迟(秒)
+LATENCY = 0.3
+
+
+def _fake_html(username: str, page: int) -> str:
+    albums = "".join(f'<div id="favorites_album_{i}"><img src="media/albums/{page * 100 + i}_3x4.jpg">'
+                     f'<div class="video-title">{username} 的收藏 {i}</div></div>'
+                     for i in range(data_source.MAX_ALBUM_NUMBER))
+    pagination = "".join(f'<li><a href="?page={i}">{i}</a></li>' for i in range(1, 6))
+    return (f'<div class="header-profile-row"><div class="header-profile-row-name">等级</div>'
+            f'<div class="header-profile-row-value">3</div></div>{albums}'
+            f'<ul class="pagination">{pagination}</ul>')
+
+
+class _FakeClient:
+    def __init__(self, username: str):
+        self.username = username
+
+    def get_jm_html(self, url: str, params: dict | None = None):
+        time.sleep(LATENCY)
+        return SimpleNamespace(text=_fake_html(self.username, (params or {}).get("page", 1)))
+
+
+class _BenchmarkPage(data_source.JmFavouritePage):
+    def _login(self):
+        time.sleep(LATENCY)
+        self.client = _FakeClient(self.jm_username)
+
+
+async def benchmark(users: int):
+    start = time.perf_counter()
+    pages = await asyncio.gather(*(_BenchmarkPage(str(i), 2, f"user{i}", "").async_init() for i in range(users)))
+    elapsed = time.perf_counter() - start
+    mixed = sum(1 for page in pages if not page.page_data.albums[0].title.startswith(f"{page.jm_username} "))
+    print(f"{users}个用户同时加载: {elapsed:.2f}s, {users / elapsed:.1f} 次/s, 串号 {mixed} 个")
+
+
+if __name__ == '__main__':
+    for n in (int(arg) for arg in sys.argv[1:] or ("1", "10", "20")):
+        asyncio.run(benchmark(n))
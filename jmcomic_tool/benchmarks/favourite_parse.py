@@ -0,0 +1,73 @@
+"""
+jm收藏夹页面解析性能测试
+对比原实现(每个本子的内部html重新解析)与parse_favourite_page在各个可用后端下的耗时, 并检查解析结果一致
+
+用法: python benchmarks/favourite_parse.py [重复次数]
+"""
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from loader import load
+
+parser = load("jmcomic_favourite.parser")
+util = load("jmcomic_favourite.util")
+
+# 模拟收藏夹页面的本子数
+ALBUMS = 80
+
+
+def _fake_html() -> str:
+    rows = ('<div class="header-profile-row"><div class="header-profile-row-name">称号</div>'
+            '<div class="header-profile-row-value">大佬 <!-- 称号说明 --></div></div>'
+            '<div class="header-profile-row"><div class="header-profile-row-name">等级</div>'
+            '<div class="header-profile-row-value">12<span class="header-profile-exp">(35%)</span></div></div>'
+            '<div class="header-profile-row"><div class="header-profile-row-name">J Coins</div>'
+            '<div class="header-profile-row-value">4321</div></div>')
+    rows += "".join(f'<div class="header-profile-row"><div class="header-profile-row-name">类型{i}</div>'
+                    f'<div class="header-profile-row-value">{i * 7}</div></div>' for i in range(20))
+    albums = "".join(f'<div id="favorites_album_{i}" class="thumb-overlay"><a href="/album/{i}/">'
+                     f'<img src="media/albums/{1000 + i}_3x4.jpg" alt="cover"></a>'
+                     f'<div class="video-title title-truncate">收藏 {i} &amp; &lt;测试&gt;</div></div>'
+                     for i in range(ALBUMS))
+    pagination = "".join(f'<li><a href="?page={i}">{i}</a></li>' for i in range(1, 10))
+    return (f'<html><body>{rows}<div class="row">{albums}</div>'
+            f'<ul class="pagination">{pagination}</ul></body></html>')
+
+
+def _legacy(html: str) -> list[tuple[str, str]]:
+    # 原实现: 取出每个本子的内部html后重新解析再提取
+    soup = BeautifulSoup(html, 'html.parser')
+    result = []
+    for item in soup.select("div[id^='favorites_album_']"):
+        inner = BeautifulSoup(''.join(str(child) for child in item.contents).strip(), 'html.parser')
+        src = [e.get('src', '') for e in inner.select("img[src*='/albums/']")]
+        title = [''.join(str(c) for c in e.contents).strip() for e in inner.select("div[class*='video-title']")]
+        result.append((src[0], title[0]))
+    return result
+
+
+def _timeit(name: str, func, rounds: int):
+    func()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = func()
+    elapsed = (time.perf_counter() - start) / rounds * 1000
+    print(f"{name:<28} {elapsed:8.2f} ms/页")
+    return result
+
+
+if __name__ == '__main__':
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    page = _fake_html()
+    legacy = _timeit("原实现(嵌套重新解析)", lambda: _legacy(page), rounds)
+    expected = None
+    for backend in util.available_backends():
+        data = _timeit(f"parse_favourite_page {backend}", lambda: parser.parse_favourite_page(page, backend), rounds)
+        if expected is None:
+            expected = data
+            same = [(album.cover_url, album.title) for album in data.albums] == legacy
+            print(f"  本子与原实现{'一致' if same else '不一致'}")
+        else:
+            print(f"  结果与{util.DEFAULT_BACKEND}{'一致' if data == expected else '不一致'}")
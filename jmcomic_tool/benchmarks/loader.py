@@ -0,0 +1,51 @@
+"""
+在不执行插件__init__的情况下导入插件模块, 供性能测试脚本使用
+插件包的__init__会注册指令并调用nonebot.get_driver(), 脱离机器人运行时无法导入;
+这里为每个插件注册空的包对象, 公共组件包只执行__init__中的包内导入(重新导出的名称)
+需要安装插件的依赖(zhenxun、Pillow、jmcomic等), 不需要运行中的nonebot驱动
+"""
+import ast
+import importlib
+import sys
+from pathlib import Path
+from types import ModuleType
+
+# 插件所在目录
+PLUGIN_DIR = Path(__file__).resolve().parent.parent
+# 注册插件时使用的父包名
+PACKAGE = "jmcomic_tool"
+# 需要重新导出名称的公共组件包
+COMMON_PACKAGES = ("jmcomic_common",)
+
+
+def _register_package(name: str, path: Path) -> ModuleType:
+    package = ModuleType(name)
+    package.__path__ = [str(path)]
+    package.__package__ = name
+    sys.modules[name] = package
+    return package
+
+
+def _reexport(package: ModuleType, path: Path):
+    """
+    只执行__init__中的包内相对导入, 跳过插件元数据和驱动钩子
+    """
+    init_file = path / "__init__.py"
+    tree = ast.parse(init_file.read_text(encoding="utf-8"))
+    imports = [node for node in tree.body if isinstance(node, ast.ImportFrom) and node.level == 1]
+    exec(compile(ast.Module(body=imports, type_ignores=[]), str(init_file), "exec"), package.__dict__)
+
+
+def load(module: str) -> ModuleType:
+    """
+    导入插件模块
+    :param module: 相对插件目录的模块名, 如 jmcomic_search.renderer
+    """
+    if PACKAGE not in sys.modules:
+        _register_package(PACKAGE, PLUGIN_DIR)
+        for plugin in PLUGIN_DIR.iterdir():
+            if (plugin / "__init__.py").is_file():
+                _register_package(f"{PACKAGE}.{plugin.name}", plugin)
+        for common in COMMON_PACKAGES:
+            _reexport(sys.modules[f"{PACKAGE}.{common}"], PLUGIN_DIR / common)
+    return importlib.import_module(f"{PACKAGE}.{module}")
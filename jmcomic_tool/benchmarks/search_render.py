@@ -0,0 +1,81 @@
+"""
+jm搜索渲染模式性能测试
+对比rgba(完整画布透明合成后缩小)与rgb(按输出宽度直接在RGB画布上绘制)两种模式
+每种模式在独立的fork进程中运行以单独统计内存峰值
+
+用法: python benchmarks/search_render.py [每种模式的渲染次数]
+"""
+import multiprocessing
+import resource
+import sys
+import time
+from io import BytesIO
+
+from PIL import Image, ImageChops
+
+from loader import load
+
+renderer = load("jmcomic_search.renderer")
+layout_module = load("jmcomic_search.layout")
+
+# 测试的本子数
+ALBUMS = 80
+
+
+def _covers() -> list[bytes]:
+    covers = []
+    for i in range(ALBUMS):
+        buffer = BytesIO()
+        Image.new("RGB", (300, 400), (i * 3, 120, 200)).save(buffer, "JPEG")
+        covers.append(buffer.getvalue())
+    return covers
+
+
+def _worker(mode: str, rounds: int, queue):
+    covers = _covers()
+    spec = renderer.SearchPageSpec(layout=layout_module.get_layout(ALBUMS),
+                                   albums=tuple((str(350000 + i), f"测试标题{i}" * 8, ("全彩", "中文"))
+                                                for i in range(ALBUMS)),
+                                   page=1, max_page=10, mode=mode)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # 预热字体和背景缓存
+    renderer.render_search_page(spec, covers)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        renderer.render_search_page(spec, covers)
+    elapsed = (time.perf_counter() - start) / rounds
+    queue.put((elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before))
+
+
+def check_equivalence() -> int:
+    """
+    在完整画布上比较两种模式, 返回各卡片右半部分(只有卡片和序号, 没有彩色文字)的最大像素差
+    彩色文字的抗锯齿边缘在rgba模式中按非预乘透明度合成, 会略微变暗, 不在比较范围内
+    """
+    layout = layout_module.get_layout(ALBUMS)
+    spec = renderer.SearchPageSpec(layout=layout, albums=tuple(("", "", ()) for _ in range(ALBUMS)),
+                                   page=1, max_page=1)
+    covers = _covers()
+    difference = ImageChops.difference(renderer.render_rgba(spec, covers), renderer.render_rgb(spec, covers))
+    max_diff = 0
+    for index in range(ALBUMS):
+        item_x, item_y = layout.item_position(index)
+        box = (item_x + layout.cover_size[0] + layout.text_area_width // 2, item_y,
+               item_x + layout.item_width, item_y + layout.item_height)
+        max_diff = max(max_diff, *(high for _, high in difference.crop(box).getextrema()))
+    return max_diff
+
+
+if __name__ == '__main__':
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"卡片和序号区域两种模式的最大像素差: {check_equivalence()}")
+
+    # 测试脚本中没有其他线程, 测试进程直接fork
+    context = multiprocessing.get_context("fork")
+    for render_mode in (renderer.RENDER_MODE_RGBA, renderer.RENDER_MODE_RGB):
+        result_queue = context.Queue()
+        process = context.Process(target=_worker, args=(render_mode, rounds, result_queue))
+        process.start()
+        seconds, peak_kb = result_queue.get()
+        process.join()
+        print(f"{render_mode}: {seconds * 1000:.0f} ms/次, 内存峰值增加 {peak_kb} KB")
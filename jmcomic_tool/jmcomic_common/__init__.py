@@ -0,0 +1,40 @@
+import nonebot
+from nonebot.plugin import PluginMetadata
+from zhenxun.configs.utils import PluginExtraData
+from zhenxun.utils.enum import PluginType
+
+from .assets import AssetRegistry, assets, fit_and_crop
+from .cover_cache import CoverCache, cover_cache
+from .cover_fetcher import CoverFetcher, cover_fetcher
+from .encoder import IMAGE_EXTENSIONS, IMAGE_FORMATS, encode_image, encode_jpeg
+from .local_index import IndexedAlbum, LocalIndex, local_index
+from .render_pool import RenderLogger, RenderPool, render_logger, render_pool
+from .text_fit import GlyphWidths, glyph_widths, truncate_text, wrap_text
+
+__plugin_meta__ = PluginMetadata(
+    name="Jm公共组件",
+    description="Jm系列插件共用的缓存与工具",
+    usage="""
+    无指令, 供Jm搜索、Jm收藏夹等插件使用
+    """.strip(),
+    extra=PluginExtraData(
+        author="JUKOMU",
+        version="1.0",
+        menu_type="jmcomic",
+        plugin_type=PluginType.HIDDEN,
+    ).to_dict(),
+)
+
+driver = nonebot.get_driver()
+
+
+@driver.on_startup
+async def _():
+    await render_pool.start()
+
+
+@driver.on_shutdown
+async def _():
+    render_pool.shutdown()
+    await cover_fetcher.close()
+    local_index.close()
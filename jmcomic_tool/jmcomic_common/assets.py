@@ -0,0 +1,136 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from PIL import Image, ImageFont
+
+# 最多保留的预缩放背景数
+MAX_SCALED_BACKGROUNDS = 8
+# 最多保留的预渲染图层数, 每个渲染进程各自缓存
+MAX_CACHED_LAYERS = 8
+
+
+def fit_and_crop(img: Image.Image, target_size: tuple[int, int]) -> Image.Image:
+    """
+    等比例缩放图片至刚好覆盖目标尺寸，然后居中裁剪，确保无拉伸。
+    """
+    target_width, target_height = target_size
+    target_ratio = target_width / target_height
+    img_width, img_height = img.size
+    img_ratio = img_width / img_height
+    if img_ratio > target_ratio:
+        scale_h = target_height / img_height
+        scaled_width, scaled_height = int(img_width * scale_h), target_height
+        img = img.resize((scaled_width, scaled_height), Image.Resampling.LANCZOS)
+        left = (scaled_width - target_width) // 2
+        return img.crop((left, 0, left + target_width, scaled_height))
+    else:
+        scale_w = target_width / img_width
+        scaled_width, scaled_height = target_width, int(img_height * scale_w)
+        img = img.resize((scaled_width, scaled_height), Image.Resampling.LANCZOS)
+        top = (scaled_height - target_height) // 2
+        return img.crop((0, top, scaled_width, top + target_height))
+
+
+class AssetRegistry:
+    """
+    渲染素材缓存
+    字体按(路径, 字号)只加载一次, 图片按路径只解码一次, 背景按目标尺寸保留缩放裁剪后的结果
+    渲染器预先绘制的静态图层按调用方给出的键缓存
+    素材可能在多个渲染线程中同时请求, 加载过程加锁
+    """
+
+    def __init__(self, max_backgrounds: int, max_layers: int):
+        self.max_backgrounds = max_backgrounds
+        self.max_layers = max_layers
+        self._lock = threading.Lock()
+        # (路径, 字号) -> 字体
+        self._fonts: dict[tuple[str, int], ImageFont.FreeTypeFont] = {}
+        # (路径, 模式) -> 图片
+        self._images: dict[tuple[str, str], Image.Image] = {}
+        # (路径, 模式, 尺寸) -> 缩放裁剪后的背景
+        self._backgrounds: OrderedDict[tuple[str, str, tuple[int, int]], Image.Image] = OrderedDict()
+        # 调用方的键 -> 预渲染图层
+        self._layers: OrderedDict[Hashable, Image.Image] = OrderedDict()
+
+    def font(self, path: str, size: int) -> ImageFont.FreeTypeFont:
+        """
+        获取字体, 加载失败时抛出与ImageFont.truetype相同的异常
+        """
+        key = (path, size)
+        font = self._fonts.get(key)
+        if font is None:
+            with self._lock:
+                font = self._fonts.get(key)
+                if font is None:
+                    font = ImageFont.truetype(path, size)
+                    self._fonts[key] = font
+        return font
+
+    def _image(self, path: str, mode: str) -> Image.Image:
+        key = (path, mode)
+        img = self._images.get(key)
+        if img is None:
+            with self._lock:
+                img = self._images.get(key)
+                if img is None:
+                    with Image.open(path) as raw:
+                        if mode == "RGB" and raw.mode in ("RGBA", "LA", "P"):
+                            # 带透明度的图片以白色为底合成, 与透明合成后再转RGB的结果一致
+                            rgba = raw.convert("RGBA")
+                            img = Image.new("RGB", rgba.size, (255, 255, 255))
+                            img.paste(rgba, (0, 0), rgba)
+                        else:
+                            img = raw.convert(mode)
+                    self._images[key] = img
+        return img
+
+    def image(self, path: str, mode: str = "RGBA") -> Image.Image:
+        """
+        获取图片副本, 可直接在上面绘制
+        """
+        return self._image(path, mode).copy()
+
+    def background(self, path: str, size: tuple[int, int], mode: str = "RGBA") -> Image.Image:
+        """
+        获取缩放裁剪至目标尺寸的背景副本, 可直接在上面绘制
+        """
+        key = (path, mode, size)
+        with self._lock:
+            scaled = self._backgrounds.get(key)
+            if scaled is not None:
+                self._backgrounds.move_to_end(key)
+        if scaled is None:
+            scaled = fit_and_crop(self._image(path, mode), size)
+            with self._lock:
+                self._backgrounds[key] = scaled
+                while len(self._backgrounds) > self.max_backgrounds:
+                    self._backgrounds.popitem(last=False)
+        return scaled.copy()
+
+    def layer(self, key: Hashable, render: Callable[[], Image.Image]) -> Image.Image:
+        """
+        获取缓存的图层, 不存在时调用render绘制, 超出数量上限时淘汰最久未使用的
+        返回的图层被缓存共享, 只能读取或贴到其他图片上
+        """
+        with self._lock:
+            layer = self._layers.get(key)
+            if layer is not None:
+                self._layers.move_to_end(key)
+                return layer
+        layer = render()
+        with self._lock:
+            self._layers[key] = layer
+            while len(self._layers) > self.max_layers:
+                self._layers.popitem(last=False)
+        return layer
+
+    def clear(self):
+        with self._lock:
+            self._fonts.clear()
+            self._images.clear()
+            self._backgrounds.clear()
+            self._layers.clear()
+
+
+assets = AssetRegistry(MAX_SCALED_BACKGROUNDS, MAX_CACHED_LAYERS)
@@ -0,0 +1,28 @@
+import configparser
+import os
+
+from zhenxun.services.log import logger
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+config_path = os.path.join(script_dir, 'config.ini')
+config = configparser.ConfigParser()
+# --- 配置 ---
+# 渲染进程数, 0表示不使用进程池
+RENDER_POOL_WORKERS = 2
+
+
+def reload_config():
+    global RENDER_POOL_WORKERS
+    # 读取配置
+    try:
+        config.read(config_path, encoding='utf-8')
+        RENDER_POOL_WORKERS = config.getint('RenderPool', 'workers')
+    except FileNotFoundError:
+        logger.error("错误: 配置文件 'config.ini' 未找到！")
+    except (KeyError, configparser.Error) as e:
+        logger.error(f"错误: 配置文件中缺少了必要的键: {e}")
+    except ValueError as e:
+        logger.error(f"错误: 配置文件中的值无效: {e}")
+
+
+reload_config()
@@ -0,0 +1,46 @@
+from collections import OrderedDict
+
+# 封面缓存大小上限(字节)
+COVER_CACHE_MAX_BYTES = 96 * 1024 * 1024
+
+
+class CoverCache:
+    """
+    本子封面缓存
+    以jm号为键, 封面总大小超出上限时淘汰最久未使用的封面
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._data: OrderedDict[str, bytes] = OrderedDict()
+
+    def get(self, album_id: str) -> bytes | None:
+        cover = self._data.get(album_id)
+        if cover is not None:
+            self._data.move_to_end(album_id)
+        return cover
+
+    def set(self, album_id: str, cover: bytes):
+        if not cover or len(cover) > self.max_bytes:
+            return
+        self.remove(album_id)
+        self._data[album_id] = cover
+        self.total_bytes += len(cover)
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self.total_bytes -= len(evicted)
+
+    def remove(self, album_id: str):
+        cover = self._data.pop(album_id, None)
+        if cover is not None:
+            self.total_bytes -= len(cover)
+
+    def __contains__(self, album_id: str) -> bool:
+        return album_id in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+cover_cache = CoverCache(COVER_CACHE_MAX_BYTES)
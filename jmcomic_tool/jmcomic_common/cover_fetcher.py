@@ -0,0 +1,129 @@
+import asyncio
+from urllib.parse import urlparse
+
+import httpx
+from jmcomic import JmModuleConfig
+from zhenxun.services.log import logger
+
+from .cover_cache import cover_cache
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# 单次封面请求超时(秒)
+COVER_TIMEOUT = 15
+# 连接池最大连接数
+MAX_CONNECTIONS = 64
+# 连接池保持的空闲连接数
+MAX_KEEPALIVE_CONNECTIONS = 32
+# 每个域名同时进行的请求数
+MAX_CONNECTIONS_PER_HOST = 16
+# 单个封面最多尝试的图片域名数
+MAX_DOMAIN_RETRY = 3
+
+
+class CoverFetcher:
+    """
+    本子封面获取
+    所有请求共用一个连接池(keep-alive, 可用时使用HTTP/2), 并限制每个域名的并发数
+    同一封面同时只会请求一次, 结果写入封面缓存
+    """
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+        # 域名 -> 并发限制
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        # jm号 -> 正在进行的请求
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS),
+                timeout=httpx.Timeout(COVER_TIMEOUT),
+                headers={'user-agent': JmModuleConfig.HTML_HEADERS_TEMPLATE['user-agent']},
+                follow_redirects=True,
+            )
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+        return self._host_limits[host]
+
+    @staticmethod
+    def cover_urls(album_id: str) -> list[str]:
+        """
+        封面地址, 按图片域名顺序排列
+        """
+        return [f'https://{domain}/media/albums/{album_id}_3x4.jpg'
+                for domain in JmModuleConfig.DOMAIN_IMAGE_LIST[:MAX_DOMAIN_RETRY]]
+
+    async def request(self, url: str, headers: dict[str, str] | None = None) -> httpx.Response:
+        """
+        使用共享连接池发送GET请求, 返回原始响应(不检查状态码)
+        """
+        async with self._host_limit(url):
+            return await self._get_client().get(url, headers=headers)
+
+    async def get(self, url: str) -> bytes:
+        """
+        使用共享连接池请求任意地址
+        """
+        resp = await self.request(url)
+        resp.raise_for_status()
+        return resp.content
+
+    async def _fetch(self, album_id: str, cache: bool = True) -> bytes:
+        for url in self.cover_urls(album_id):
+            try:
+                cover = await self.get(url)
+            except httpx.HTTPError as e:
+                logger.debug(f"封面请求失败: URL={url}, {type(e).__name__}")
+                continue
+            if cover:
+                if cache:
+                    cover_cache.set(album_id, cover)
+                return cover
+        logger.error(f"封面获取失败: {album_id}")
+        return b""
+
+    async def fetch(self, album_id: str, cache: bool = True) -> bytes:
+        """
+        获取封面二进制数据, 失败时返回空bytes
+        :param album_id: 本子jm号(纯数字)
+        :param cache: 是否将结果写入封面缓存, 批量获取冷门封面(如快照)时不写入, 避免挤掉常用的封面
+        """
+        cover = cover_cache.get(album_id)
+        if cover is not None:
+            return cover
+        task = self._inflight.get(album_id)
+        if task is None and not cache:
+            return await self._fetch(album_id, cache=False)
+        if task is None:
+            task = asyncio.create_task(self._fetch(album_id))
+            self._inflight[album_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(album_id, None))
+        # 调用方被取消时不影响其他等待同一封面的请求
+        return await asyncio.shield(task)
+
+    async def fetch_many(self, album_ids: list[str], cache: bool = True) -> list[bytes]:
+        """
+        并发获取多个封面, 结果顺序与album_ids一致
+        """
+        return list(await asyncio.gather(*(self.fetch(album_id, cache) for album_id in album_ids)))
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+cover_fetcher = CoverFetcher()
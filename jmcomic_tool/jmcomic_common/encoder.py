@@ -0,0 +1,107 @@
+from io import BytesIO
+
+from PIL import Image
+
+from .render_pool import render_logger
+
+# 压缩时的最低jpeg质量
+MIN_QUALITY = 10
+# 每次降低的jpeg质量
+QUALITY_STEP = 5
+
+
+# 支持的输出格式 -> Pillow格式名
+IMAGE_FORMATS = {"jpeg": "JPEG", "webp": "WEBP", "png": "PNG"}
+# 输出格式 -> 文件扩展名
+IMAGE_EXTENSIONS = {"jpeg": "jpg", "webp": "webp", "png": "png"}
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """
+    RGBA/P图片以白色为底合成为RGB
+    """
+    if image.mode in ('RGBA', 'P'):
+        rgba = image.convert('RGBA')
+        flattened = Image.new("RGB", rgba.size, (255, 255, 255))
+        flattened.paste(rgba, (0, 0), rgba)
+        return flattened
+    if image.mode != 'RGB':
+        return image.convert('RGB')
+    return image
+
+
+def encode_image(
+        image: Image.Image,
+        image_format: str = "jpeg",
+        target_size: tuple[int, int] | None = None,
+        target_kb: int = 500,
+        quality: int = 95
+) -> bytes | None:
+    """
+    将图片缩放到目标尺寸并编码为不超过目标大小(KB)的jpeg/webp, png为无损格式, 不做大小限制
+
+    图片只缩放和转换一次, 之后迭代地降低质量直至满足大小要求,
+    最低质量仍超出时返回最低质量的结果。
+
+    :param image: 需要编码的图片, jpeg/webp时RGBA/P图片以白色为底合成
+    :param image_format: 输出格式 jpeg / webp / png
+    :param target_size: (可选) 目标像素尺寸，格式为 (width, height)。
+                        如果为 None，则不改变图片尺寸。
+    :param target_kb: 目标文件大小（单位：KB）。
+    :param quality: 初始的压缩质量（1-95）。
+    :return: 编码后的数据，或 None。
+    """
+    pil_format = IMAGE_FORMATS.get(image_format)
+    if pil_format is None:
+        render_logger.error(f"不支持的图片格式: {image_format}")
+        return None
+
+    output_image = image
+    if target_size and output_image.size != tuple(target_size):
+        try:
+            # 使用 LANCZOS 滤镜进行高质量的缩放
+            output_image = output_image.resize(target_size, Image.Resampling.LANCZOS)
+        except Exception as e:
+            render_logger.error(f"调整图片尺寸时发生错误: {e}")
+            return None
+
+    buffer = BytesIO()
+    if pil_format == "PNG":
+        try:
+            output_image.save(buffer, format="PNG")
+            return buffer.getvalue()
+        except Exception as e:
+            render_logger.error(f"压缩图片时发生错误: {e}")
+            return None
+
+    output_image = _flatten(output_image)
+    # webp的method 4在速度和压缩率之间折中, jpeg使用optimize
+    save_args = {"optimize": True} if pil_format == "JPEG" else {"method": 4}
+    final_bytes = None
+    current_quality = quality
+    while current_quality >= MIN_QUALITY:
+        try:
+            buffer.seek(0)
+            buffer.truncate()
+            output_image.save(buffer, format=pil_format, quality=current_quality, **save_args)
+            final_bytes = buffer.getvalue()
+            if len(final_bytes) <= target_kb * 1024:
+                return final_bytes
+            current_quality -= QUALITY_STEP
+        except Exception as e:
+            render_logger.error(f"压缩图片时发生错误: {e}")
+            return None
+
+    return final_bytes
+
+
+def encode_jpeg(
+        image: Image.Image,
+        target_size: tuple[int, int] | None = None,
+        target_kb: int = 500,
+        quality: int = 95
+) -> bytes | None:
+    """
+    将图片缩放到目标尺寸并编码为不超过目标大小(KB)的jpeg, 见encode_image
+    """
+    return encode_image(image, "jpeg", target_size, target_kb, quality)
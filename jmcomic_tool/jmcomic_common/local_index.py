@@ -0,0 +1,175 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from zhenxun.configs.path_config import DATA_PATH
+from zhenxun.services.log import logger
+
+# 本地索引数据库路径
+LOCAL_INDEX_PATH = DATA_PATH / "jmcomic" / "local_index.db"
+# 列表字段的分隔符
+SEPARATOR = "\x1f"
+# trigram分词要求的最短关键词长度, 更短的关键词使用LIKE匹配
+MIN_FTS_TERM_LENGTH = 3
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS albums (
+    id INTEGER PRIMARY KEY,
+    album_id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL DEFAULT '',
+    tags TEXT NOT NULL DEFAULT '',
+    authors TEXT NOT NULL DEFAULT '',
+    updated_at REAL NOT NULL
+);
+"""
+
+# 外部内容表, 不重复保存文本, 由触发器按rowid(albums.id)同步
+CREATE_FTS_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS albums_fts USING fts5(
+    title, tags, authors, content = 'albums', content_rowid = 'id', tokenize = 'trigram'
+);
+CREATE TRIGGER IF NOT EXISTS albums_fts_insert AFTER INSERT ON albums BEGIN
+    INSERT INTO albums_fts (rowid, title, tags, authors) VALUES (new.id, new.title, new.tags, new.authors);
+END;
+CREATE TRIGGER IF NOT EXISTS albums_fts_delete AFTER DELETE ON albums BEGIN
+    INSERT INTO albums_fts (albums_fts, rowid, title, tags, authors)
+        VALUES ('delete', old.id, old.title, old.tags, old.authors);
+END;
+CREATE TRIGGER IF NOT EXISTS albums_fts_update AFTER UPDATE OF title, tags, authors ON albums
+WHEN old.title != new.title OR old.tags != new.tags OR old.authors != new.authors BEGIN
+    INSERT INTO albums_fts (albums_fts, rowid, title, tags, authors)
+        VALUES ('delete', old.id, old.title, old.tags, old.authors);
+    INSERT INTO albums_fts (rowid, title, tags, authors) VALUES (new.id, new.title, new.tags, new.authors);
+END;
+"""
+
+# 新记录中为空的字段保留已有的值(例如搜索结果不包含作者)
+UPSERT_SQL = """
+INSERT INTO albums (album_id, title, tags, authors, updated_at) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(album_id) DO UPDATE SET
+    title = CASE WHEN excluded.title != '' THEN excluded.title ELSE albums.title END,
+    tags = CASE WHEN excluded.tags != '' THEN excluded.tags ELSE albums.tags END,
+    authors = CASE WHEN excluded.authors != '' THEN excluded.authors ELSE albums.authors END,
+    updated_at = excluded.updated_at
+"""
+
+
+@dataclass(frozen=True)
+class IndexedAlbum:
+    """
+    本地索引中的本子
+    :param album_id: 本子jm号(纯数字)
+    :param title: 标题
+    :param tags: 标签
+    :param authors: 作者
+    """
+    album_id: str
+    title: str = ""
+    tags: tuple[str, ...] = ()
+    authors: tuple[str, ...] = ()
+
+
+class LocalIndex:
+    """
+    本地本子索引
+    收集jm信息、搜索结果和收藏夹中出现过的本子, 不请求网站即可按标题、标签、作者搜索
+    使用SQLite FTS5(trigram分词)全文索引, SQLite不支持FTS5或关键词过短时使用LIKE匹配
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._fts = False
+        self._lock = threading.Lock()
+        # 正在进行的后台写入, 防止任务被回收
+        self._pending: set[asyncio.Task] = set()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(CREATE_SQL)
+            try:
+                conn.executescript(CREATE_FTS_SQL)
+                self._fts = True
+            except sqlite3.OperationalError as e:
+                logger.warning(f"SQLite不支持FTS5 trigram, jm本地搜索使用LIKE匹配: {e}")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _add_sync(self, albums: list[IndexedAlbum]):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                # 全文索引由触发器按rowid更新
+                conn.executemany(UPSERT_SQL, [(album.album_id, album.title, SEPARATOR.join(album.tags),
+                                               SEPARATOR.join(album.authors), now) for album in albums])
+
+    def _search_sync(self, terms: list[str], limit: int) -> tuple[list[IndexedAlbum], int]:
+        with self._lock:
+            conn = self._connect()
+            fts_terms = [term for term in terms if len(term) >= MIN_FTS_TERM_LENGTH] if self._fts else []
+            like_terms = [term for term in terms if term not in fts_terms]
+            conditions, params = [], []
+            if fts_terms:
+                conditions.append("id IN (SELECT rowid FROM albums_fts WHERE albums_fts MATCH ?)")
+                params.append(" AND ".join('"' + term.replace('"', '""') + '"' for term in fts_terms))
+            for term in like_terms:
+                conditions.append("(title LIKE ? ESCAPE '\\' OR tags LIKE ? ESCAPE '\\' OR authors LIKE ? ESCAPE '\\')")
+                pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                params.extend([pattern] * 3)
+            where = " AND ".join(conditions) or "1"
+            total = conn.execute(f"SELECT COUNT(*) FROM albums WHERE {where}", params).fetchone()[0]
+            rows = conn.execute(f"SELECT album_id, title, tags, authors FROM albums WHERE {where} "
+                                f"ORDER BY updated_at DESC LIMIT ?", [*params, limit]).fetchall()
+        return [IndexedAlbum(album_id=row[0], title=row[1],
+                             tags=tuple(filter(None, row[2].split(SEPARATOR))),
+                             authors=tuple(filter(None, row[3].split(SEPARATOR)))) for row in rows], total
+
+    async def add(self, albums: list[IndexedAlbum]):
+        """
+        写入或更新本子
+        """
+        albums = [album for album in albums if album.album_id]
+        if albums:
+            await asyncio.to_thread(self._add_sync, albums)
+
+    def submit(self, albums: list[IndexedAlbum]):
+        """
+        在后台写入本子, 不等待完成, 写入失败只记录日志
+        """
+
+        async def _add():
+            try:
+                await self.add(albums)
+            except Exception as e:
+                logger.warning("jm本地索引写入失败", e=e)
+
+        task = asyncio.create_task(_add())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def search(self, terms: list[str], limit: int = 30) -> tuple[list[IndexedAlbum], int]:
+        """
+        搜索同时包含所有关键词(标题、标签或作者中)的本子, 按最近出现时间排序
+        :return: (最多limit个结果, 结果总数)
+        """
+        terms = [term.strip() for term in terms if term.strip()]
+        if not terms:
+            return [], 0
+        return await asyncio.to_thread(self._search_sync, terms, limit)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+local_index = LocalIndex(LOCAL_INDEX_PATH)
@@ -0,0 +1,131 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, TypeVar
+
+from zhenxun.services.log import logger
+
+from .assets import assets
+from .config import RENDER_POOL_WORKERS
+from .text_fit import glyph_widths
+
+T = TypeVar("T")
+
+
+class RenderLogger:
+    """
+    渲染函数使用的日志
+    渲染进程由运行中的多线程进程fork创建, 父进程中其他线程可能正持有日志处理器的锁,
+    因此渲染进程中不调用logger, 日志暂存后随渲染结果返回主进程记录; 主进程中直接记录
+    """
+
+    def __init__(self):
+        self.in_worker = False
+        self.records: list[tuple[str, str]] = []
+
+    def _log(self, level: str, message: str):
+        if self.in_worker:
+            self.records.append((level, message))
+        else:
+            getattr(logger, level)(message)
+
+    def debug(self, message: str):
+        self._log("debug", message)
+
+    def info(self, message: str):
+        self._log("info", message)
+
+    def warning(self, message: str):
+        self._log("warning", message)
+
+    def error(self, message: str):
+        self._log("error", message)
+
+
+render_logger = RenderLogger()
+
+
+def _init_worker():
+    """
+    渲染进程初始化
+    进程由fork创建, 父进程中其他线程持有的锁不会被释放, 重新创建素材缓存的锁, 并停止直接使用logger
+    """
+    assets._lock = threading.Lock()
+    glyph_widths._lock = threading.Lock()
+    render_logger.in_worker = True
+    render_logger.records = []
+
+
+def _run_in_worker(func: Callable[..., T], args: tuple) -> tuple[T, list[tuple[str, str]]]:
+    """
+    在渲染进程中执行func, 返回结果和期间暂存的日志
+    """
+    render_logger.records = []
+    try:
+        return func(*args), render_logger.records
+    finally:
+        render_logger.records = []
+
+
+def _noop():
+    return None
+
+
+class RenderPool:
+    """
+    渲染进程池
+    渲染函数和参数需要可序列化, 渲染进程通过fork继承已加载的插件模块和素材缓存
+    插件模块导入时需要nonebot驱动, 无法使用spawn/forkserver; 渲染函数中只能使用render_logger记录日志
+    不支持fork的平台或未配置进程数时在线程中渲染
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Executor | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0 and "fork" in multiprocessing.get_all_start_methods()
+
+    def _get_executor(self) -> Executor | None:
+        if self._executor is None and self.enabled:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("fork"),
+                                                 initializer=_init_worker)
+        return self._executor
+
+    async def start(self):
+        """
+        在启动时(线程最少时)预先创建渲染进程, 避免在渲染请求到达时才fork
+        """
+        executor = self._get_executor()
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(executor, _noop)
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """
+        在渲染进程中执行func, 进程池不可用时在线程中执行
+        """
+        executor = self._get_executor()
+        if executor is None:
+            return await asyncio.to_thread(func, *args)
+        try:
+            result, records = await asyncio.get_running_loop().run_in_executor(executor, _run_in_worker, func, args)
+        except BrokenProcessPool as e:
+            # 渲染进程异常退出, 下次请求重建进程池, 本次在线程中完成
+            logger.warning("渲染进程池异常, 已重建", e=e)
+            self._executor = None
+            return await asyncio.to_thread(func, *args)
+        for level, message in records:
+            getattr(logger, level)(message)
+        return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+render_pool = RenderPool(RENDER_POOL_WORKERS)
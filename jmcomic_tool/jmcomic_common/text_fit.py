@@ -0,0 +1,102 @@
+import threading
+import weakref
+from bisect import bisect_right
+from itertools import accumulate
+
+from PIL import ImageFont
+
+ELLIPSIS = "..."
+
+
+class GlyphWidths:
+    """
+    字符宽度缓存
+    每个字体的每个字符只测量一次, 文本宽度按字符宽度累加(不考虑字距调整)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 字体 -> (字符 -> 宽度)
+        self._widths: weakref.WeakKeyDictionary[ImageFont.FreeTypeFont, dict[str, float]] = \
+            weakref.WeakKeyDictionary()
+
+    def _font_widths(self, font: ImageFont.FreeTypeFont) -> dict[str, float]:
+        widths = self._widths.get(font)
+        if widths is None:
+            with self._lock:
+                widths = self._widths.setdefault(font, {})
+        return widths
+
+    def advances(self, text: str, font: ImageFont.FreeTypeFont) -> list[float]:
+        """
+        文本中每个字符的宽度
+        """
+        widths = self._font_widths(font)
+        result = []
+        for char in text:
+            width = widths.get(char)
+            if width is None:
+                width = widths[char] = font.getlength(char)
+            result.append(width)
+        return result
+
+    def prefix(self, text: str, font: ImageFont.FreeTypeFont) -> list[float]:
+        """
+        宽度前缀和, prefix[i]为text[:i]的宽度
+        """
+        return list(accumulate(self.advances(text, font), initial=0.0))
+
+    def length(self, text: str, font: ImageFont.FreeTypeFont) -> float:
+        return sum(self.advances(text, font))
+
+
+glyph_widths = GlyphWidths()
+
+
+def _fit_end(prefix: list[float], start: int, max_width: float) -> int:
+    """
+    从start开始在max_width内最多能放到的位置(不含)
+    """
+    return max(bisect_right(prefix, prefix[start] + max_width) - 1, start)
+
+
+def truncate_text(text: str, font: ImageFont.FreeTypeFont, max_width: float, ellipsis: str = ELLIPSIS) -> str:
+    """
+    如果文本超过最大宽度，则截断并添加省略号
+    """
+    prefix = glyph_widths.prefix(text, font)
+    if prefix[-1] <= max_width:
+        return text
+    end = _fit_end(prefix, 0, max_width - glyph_widths.length(ellipsis, font))
+    return text[:end] + ellipsis
+
+
+def wrap_text(text: str,
+              font: ImageFont.FreeTypeFont,
+              max_width: float,
+              max_lines: int,
+              ellipsis: str = ELLIPSIS) -> list[str]:
+    """
+    按字符将文本换行, 最多max_lines行, 最后一行放不下时截断并添加省略号
+    """
+    if not text:
+        return []
+    prefix = glyph_widths.prefix(text, font)
+    ellipsis_width = glyph_widths.length(ellipsis, font)
+    lines = []
+    start = 0
+    while start < len(text):
+        end = _fit_end(prefix, start, max_width)
+        if end == start:
+            # 单个字符就超出宽度时也至少放一个字符, 避免死循环
+            end = start + 1
+        if end >= len(text):
+            lines.append(text[start:])
+            break
+        if len(lines) == max_lines - 1:
+            end = _fit_end(prefix, start, max_width - ellipsis_width)
+            lines.append(text[start:end] + ellipsis)
+            break
+        lines.append(text[start:end])
+        start = end
+    return lines
@@ -1,14 +1,23 @@
+from nonebot import require
 from nonebot.adapters.onebot.v11 import Bot
 from nonebot.plugin import PluginMetadata
 from nonebot.rule import to_me
-from nonebot_plugin_alconna import Alconna, Args, Arparma, on_alconna, Match
+from jmcomic import JmModuleConfig
+from nonebot_plugin_alconna import Alconna, Args, Arparma, on_alconna, Match, Option
 from nonebot_plugin_uninfo import Uninfo
 from zhenxun.configs.utils import PluginExtraData
 from zhenxun.models.jm_account import JmAccount
 from zhenxun.utils.message import MessageUtils
-from zhenxun.utils.platform import PlatformUtils
 
+require("nonebot_plugin_apscheduler")
+from nonebot_plugin_apscheduler import scheduler
+
+from .avatar import avatar_cache
+from .config import SYNC_ENABLED, SYNC_INTERVAL
 from .data_source import *
+from .snapshot import build_snapshot, export_csv
+from .sync import FavouriteSync, cache_path
+from ..jmcomic_info import create_image_gallery_html, upload_file, upload_gallery_html
 
 __plugin_meta__ = PluginMetadata(
     name="Jm收藏夹",
@@ -17,10 +26,19 @@ __plugin_meta__ = PluginMetadata(
     指令：
         jm收藏夹 ?[页码]
         jm收藏夹 更新
+        jm收藏夹 重建
     示例：
         jm收藏夹: 默认获取收藏夹第一页
         jm收藏夹 2: 获取收藏夹第二页
-        jm收藏夹 更新: 更新你的收藏夹
+        jm收藏夹 更新: 同步你的收藏夹, 只重新生成有变化的页
+        jm收藏夹 重建: 删除你的所有收藏夹缓存
+
+        jm收藏夹快照 ?[csv] ?[刷新]
+        获取收藏夹的所有页并导出为html画廊(或csv)文件, 收藏很多时中断后再次发送会继续获取
+    示例：
+        jm收藏夹快照: 导出html画廊
+        jm收藏夹快照 csv: 导出csv
+        jm收藏夹快照 刷新: 丢弃已有快照重新获取
     """.strip(),
     extra=PluginExtraData(
         author="JUKOMU",
@@ -31,12 +49,17 @@ __plugin_meta__ = PluginMetadata(
 
 """
 page -> int 获取对应页码的收藏夹
-page -> str -> "更新收藏夹"
+page -> str -> "更新" 增量同步收藏夹
+page -> str -> "重建" 删除收藏夹缓存
 """
 _matcher = on_alconna(
     Alconna("jm收藏夹", Args["page?", str]), priority=5, block=True, rule=to_me()
 )
 
+_snapshot_matcher = on_alconna(
+    Alconna("jm收藏夹快照", Option("csv"), Option("刷新")), priority=5, block=True, rule=to_me()
+)
+
 
 async def _handle_send(log_meg: str, arparma, session, *send_meg):
     await (MessageUtils.build_message(list(send_meg)).send(reply_to=True))
@@ -56,31 +79,23 @@ async def _(bot: Bot, session: Uninfo, arparma: Arparma, page: Match[int]):
     jm_username = jm_account.username
     jm_password = jm_account.password
 
-    # 获取用户QQ头像
-    ava_url = PlatformUtils.get_user_avatar_url(uid, "qq", session.self_id)
-    resp = await asyncio.to_thread(
-        handle_request,
-        ava_url,
-        "GET")
-    avatar: bytes = resp.content
-
     """
         不带参数，默认参数，获取收藏夹第一页
     """
     if not page.available:
         # 获取已缓存的图片
-        path = Path() / f"{BASE_PATH}/{uid}_{1}.png"
+        path = cache_path(uid, 1)
         if path.exists():
             await _handle_send(f"jm收藏夹 {uid}, page {1}", arparma, session, path)
             return
         # 没有缓存
         fpage = await JmFavouritePage(uid, 1, jm_username, jm_password).async_init()
-        fpage.set_avatar(avatar)
         if not fpage.check():
             return
+        # 只在需要生成图片时获取QQ头像
+        fpage.set_avatar(await avatar_cache.get(uid, session.self_id))
         # 生成收藏夹信息图片
-        img = await fpage.create_page_img()
-        img.save(path.absolute())
+        path = await FavouriteSync.render(fpage)
         # 发送图片
         await _handle_send(f"jm收藏夹 {uid}, page {1}", arparma, session, path)
         return
@@ -92,8 +107,17 @@ async def _(bot: Bot, session: Uninfo, arparma: Arparma, page: Match[int]):
     page_result = str(page.result)
     # page -> “更新”
     if page_result == "更新":
-        # 删除缓存图片
-        if await JmFavouritePage.clear_cache(uid):
+        pages = await FavouriteSync.sync(uid, jm_username, jm_password, session.self_id)
+        if pages:
+            await _handle_send(f"jm收藏夹同步成功,uid: {uid}, 重新生成 {pages}", arparma, session,
+                               f"收藏夹已更新, 重新生成了第{'、'.join(map(str, pages))}页")
+        else:
+            await _handle_send(f"jm收藏夹同步成功,uid: {uid}, 没有变化", arparma, session, "收藏夹已是最新")
+        return
+    # page -> “重建”
+    if page_result == "重建":
+        # 删除缓存图片和收藏记录
+        if await FavouriteSync.rebuild(uid, jm_username):
             await _handle_send(f"jm收藏夹更新成功,uid: {uid}", arparma, session, "已删除缓存")
         else:
             await _handle_send(f"jm收藏夹更新失败,uid: {uid}", arparma, session, "更新失败")
@@ -106,17 +130,53 @@ async def _(bot: Bot, session: Uninfo, arparma: Arparma, page: Match[int]):
         带参数，page -> int
     """
     # 获取已缓存的图片
-    path = Path() / f"{BASE_PATH}/{uid}_{page_result}.png"
+    path = cache_path(uid, int(page_result))
     if path.exists():
         await _handle_send(f"jm收藏夹 {uid}, page {page_result}", arparma, session, path)
         return
     # 没有缓存
     fpage = await JmFavouritePage(uid, int(page_result), jm_username, jm_password).async_init()
-    fpage.set_avatar(avatar)
     if fpage.check():
+        # 只在需要生成图片时获取QQ头像
+        fpage.set_avatar(await avatar_cache.get(uid, session.self_id))
         # 生成收藏夹信息图片
-        img = await fpage.create_page_img()
-        img.save(path.absolute())
+        path = await FavouriteSync.render(fpage)
         # 发送图片
         await _handle_send(f"jm收藏夹 {uid}, page {page_result}", arparma, session, path)
         return
+
+
+@_snapshot_matcher.handle()
+async def _(bot: Bot, session: Uninfo, arparma: Arparma):
+    uid = session.user.id
+    jm_account = await JmAccount.get_user(uid)
+    if jm_account.id == -1:
+        await _handle_send("用户未登录，提示用户登录", arparma, session, "你还没有登录jm哦，请重新登录")
+        return
+    await MessageUtils.build_message(["正在获取收藏夹快照, 收藏较多时需要一些时间..."]).send(reply_to=True)
+    snapshot = await build_snapshot(uid, jm_account.username, jm_account.password, refresh=arparma.find("刷新"))
+    albums = snapshot.albums()
+    if not albums:
+        await _handle_send(f"jm收藏夹快照 {uid}, 收藏夹为空", arparma, session, "收藏夹是空的")
+        return
+    if arparma.find("csv"):
+        path = await asyncio.to_thread(export_csv, snapshot)
+        await upload_file(bot, session, path, path.name)
+    else:
+        current_timestamp = create_image_gallery_html(
+            image_paths=[f'https://{JmModuleConfig.DOMAIN_IMAGE_LIST[0]}/media/albums/{album.album_id}_3x4.jpg'
+                         for album in albums],
+            descriptions_data=[[album.album_id, album.title, "-", "-", "-"] for album in albums],
+        )
+        await upload_gallery_html(bot, session, current_timestamp)
+    missing = snapshot.missing_pages()
+    if missing:
+        await _handle_send(f"jm收藏夹快照 {uid}, 缺少{len(missing)}页", arparma, session,
+                           f"已导出{len(albums)}个本子, 还有{len(missing)}页获取失败, 再次发送jm收藏夹快照可继续获取")
+    else:
+        logger.info(f"jm收藏夹快照 {uid}, 共{len(albums)}个", arparma.header_result, session=session)
+
+
+if SYNC_ENABLED:
+    # 定时同步长时间未同步的收藏夹
+    scheduler.add_job(FavouriteSync.sync_stale, "interval", minutes=SYNC_INTERVAL, id="jm_favourite_sync")
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+from zhenxun.configs.path_config import DATA_PATH
+from zhenxun.services.log import logger
+from zhenxun.utils.platform import PlatformUtils
+
+from .config import AVATAR_TTL
+from ..jmcomic_common import cover_fetcher
+
+# 头像缓存目录
+AVATAR_PATH = DATA_PATH / "jmcomic" / "avatars"
+# 内存中最多保留的头像数
+MAX_MEMORY_AVATARS = 64
+
+
+@dataclass
+class CachedAvatar:
+    """
+    缓存的头像
+    :param data: 头像二进制数据
+    :param fetched_at: 上次确认有效的时间(时间戳)
+    :param etag: 响应的ETag
+    :param last_modified: 响应的Last-Modified
+    """
+    data: bytes
+    fetched_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() - self.fetched_at <= AVATAR_TTL
+
+
+class AvatarCache:
+    """
+    QQ头像缓存, 内存 + 磁盘(DATA_PATH/jmcomic/avatars)
+    有效期内直接使用缓存, 过期后带ETag/Last-Modified条件请求, 未变化时只刷新有效期
+    请求失败时使用过期的缓存
+    """
+
+    def __init__(self, path: Path, max_memory: int):
+        self.path = path
+        self.max_memory = max_memory
+        self._memory: OrderedDict[str, CachedAvatar] = OrderedDict()
+        # uid -> 正在进行的请求
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def _data_path(self, uid: str) -> Path:
+        return self.path / f"{uid}.img"
+
+    def _meta_path(self, uid: str) -> Path:
+        return self.path / f"{uid}.json"
+
+    def _remember(self, uid: str, avatar: CachedAvatar):
+        self._memory[uid] = avatar
+        self._memory.move_to_end(uid)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def _load_sync(self, uid: str) -> CachedAvatar | None:
+        try:
+            meta = json.loads(self._meta_path(uid).read_text(encoding="utf-8"))
+            return CachedAvatar(data=self._data_path(uid).read_bytes(), fetched_at=meta["fetched_at"],
+                                etag=meta.get("etag"), last_modified=meta.get("last_modified"))
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError) as e:
+            logger.warning(f"头像缓存读取失败 {uid}: {e}")
+            return None
+
+    def _save_sync(self, uid: str, avatar: CachedAvatar, write_data: bool):
+        self.path.mkdir(parents=True, exist_ok=True)
+        if write_data:
+            self._data_path(uid).write_bytes(avatar.data)
+        self._meta_path(uid).write_text(json.dumps({"fetched_at": avatar.fetched_at, "etag": avatar.etag,
+                                                    "last_modified": avatar.last_modified}), encoding="utf-8")
+
+    async def _refresh(self, uid: str, url: str, cached: CachedAvatar | None) -> bytes | None:
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        try:
+            resp = await cover_fetcher.request(url, headers=headers)
+            if resp.status_code == 304 and cached is not None:
+                cached.fetched_at = time.time()
+                await asyncio.to_thread(self._save_sync, uid, cached, False)
+                return cached.data
+            resp.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"头像获取失败 {uid}", e=e)
+            return cached.data if cached is not None else None
+        avatar = CachedAvatar(data=resp.content, fetched_at=time.time(),
+                              etag=resp.headers.get("ETag"), last_modified=resp.headers.get("Last-Modified"))
+        self._remember(uid, avatar)
+        await asyncio.to_thread(self._save_sync, uid, avatar, True)
+        return avatar.data
+
+    async def get(self, uid: str, self_id: str | None = None) -> bytes | None:
+        """
+        获取用户QQ头像, 没有缓存且请求失败时返回None
+        """
+        cached = self._memory.get(uid)
+        if cached is None:
+            cached = await asyncio.to_thread(self._load_sync, uid)
+            if cached is not None:
+                self._remember(uid, cached)
+        if cached is not None and cached.fresh:
+            self._memory.move_to_end(uid)
+            return cached.data
+        task = self._inflight.get(uid)
+        if task is None:
+            url = PlatformUtils.get_user_avatar_url(uid, "qq", self_id)
+            task = asyncio.create_task(self._refresh(uid, url, cached))
+            self._inflight[uid] = task
+            task.add_done_callback(lambda _: self._inflight.pop(uid, None))
+        return await asyncio.shield(task)
+
+
+avatar_cache = AvatarCache(AVATAR_PATH, MAX_MEMORY_AVATARS)
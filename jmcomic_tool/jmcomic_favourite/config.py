@@ -0,0 +1,66 @@
+import configparser
+import os
+
+from zhenxun.services.log import logger
+
+from .util import DEFAULT_BACKEND, available_backends
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+config_path = os.path.join(script_dir, 'config.ini')
+config = configparser.ConfigParser()
+# --- 配置 ---
+# 每个账号收藏夹最大页码的缓存有效期(秒)
+MAX_PAGE_TTL = 600
+# 是否定时同步收藏夹
+SYNC_ENABLED = True
+# 定时检查间隔(分钟)
+SYNC_INTERVAL = 30
+# 超过该时间(秒)未同步的用户会被同步
+SYNC_STALE_AFTER = 6 * 60 * 60
+# 每次定时检查最多同步的用户数
+SYNC_BATCH = 10
+# 收藏夹快照同时请求的页数
+SNAPSHOT_CONCURRENCY = 4
+# QQ头像缓存有效期(秒)
+AVATAR_TTL = 24 * 60 * 60
+# 收藏夹图片格式 jpeg / webp / png
+OUTPUT_FORMAT = "jpeg"
+# 初始压缩质量
+OUTPUT_QUALITY = 90
+# 目标大小(KB)
+OUTPUT_TARGET_KB = 2048
+# 输出宽度(像素), 0表示保持原尺寸
+OUTPUT_MAX_WIDTH = 0
+# 收藏夹页面解析后端 html.parser / lxml / selectolax
+PARSER_BACKEND = DEFAULT_BACKEND
+
+
+def reload_config():
+    global MAX_PAGE_TTL, SYNC_ENABLED, SYNC_INTERVAL, SYNC_STALE_AFTER, SYNC_BATCH, SNAPSHOT_CONCURRENCY, AVATAR_TTL, OUTPUT_FORMAT, OUTPUT_QUALITY, OUTPUT_TARGET_KB, OUTPUT_MAX_WIDTH, PARSER_BACKEND
+    # 读取配置
+    try:
+        config.read(config_path, encoding='utf-8')
+        MAX_PAGE_TTL = config.getint('MaxPage', 'ttl')
+        SYNC_ENABLED = config.getboolean('Sync', 'enabled')
+        SYNC_INTERVAL = config.getint('Sync', 'interval')
+        SYNC_STALE_AFTER = config.getint('Sync', 'stale_after')
+        SYNC_BATCH = config.getint('Sync', 'batch')
+        SNAPSHOT_CONCURRENCY = config.getint('Snapshot', 'concurrency')
+        AVATAR_TTL = config.getint('Avatar', 'ttl')
+        OUTPUT_FORMAT = config['Output']['format'].strip().lower()
+        OUTPUT_QUALITY = config.getint('Output', 'quality')
+        OUTPUT_TARGET_KB = config.getint('Output', 'target_kb')
+        OUTPUT_MAX_WIDTH = config.getint('Output', 'max_width')
+        PARSER_BACKEND = config['Parser']['backend'].strip().lower()
+        if PARSER_BACKEND not in available_backends():
+            logger.warning(f"jm收藏夹解析后端 {PARSER_BACKEND} 不可用, 使用 {DEFAULT_BACKEND}")
+            PARSER_BACKEND = DEFAULT_BACKEND
+    except FileNotFoundError:
+        logger.error("错误: 配置文件 'config.ini' 未找到！")
+    except (KeyError, configparser.Error) as e:
+        logger.error(f"错误: 配置文件中缺少了必要的键: {e}")
+    except ValueError as e:
+        logger.error(f"错误: 配置文件中的值无效: {e}")
+
+
+reload_config()
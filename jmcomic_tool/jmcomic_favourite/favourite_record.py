@@ -0,0 +1,90 @@
+import json
+import time
+
+from tortoise import fields
+from zhenxun.services.db_context import Model
+
+# 未知位置的占位
+UNKNOWN_ALBUM = ""
+
+
+class JmFavouriteRecord(Model):
+    # 自增id
+    id = fields.IntField(pk=True, generated=True, auto_increment=True)
+    # QQ号
+    qq_id = fields.CharField(255, unique=True, description="QQ号")
+    # JM用户名
+    username = fields.TextField(description="JM用户名")
+    # 按收藏夹顺序排列的jm号(json列表), 未获取过的位置为空字符串
+    album_ids = fields.TextField(default="[]", description="收藏的jm号")
+    # 最大页码
+    max_page = fields.IntField(default=0, description="最大页码")
+    # 上次同步时间(时间戳)
+    synced_at = fields.FloatField(default=0, description="上次同步时间")
+
+    class Meta:  # pyright: ignore [reportIncompatibleVariableOverride]
+        table = "jm_favourite_record"
+        table_description = "JM收藏夹记录表"
+
+    def get_album_ids(self) -> list[str]:
+        return json.loads(self.album_ids or "[]")
+
+    def set_album_ids(self, album_ids: list[str]):
+        self.album_ids = json.dumps(album_ids)
+
+    @classmethod
+    async def get_record(cls, qq_id: str, username: str) -> "JmFavouriteRecord":
+        """获取用户的收藏夹记录, 不存在或换了账号时返回新的记录
+
+        参数:
+            qq_id: 用户QQ号
+            username: JM用户名
+        返回:
+            JmFavouriteRecord: JmFavouriteRecord
+        """
+        record = await cls.get_or_none(qq_id=qq_id)
+        if record is None:
+            return cls(qq_id=qq_id, username=username)
+        if record.username != username:
+            record.username = username
+            record.set_album_ids([])
+            record.max_page = 0
+            record.synced_at = 0
+        return record
+
+    @classmethod
+    async def save_page(cls, qq_id: str, username: str, page: int, page_size: int, album_ids: list[str],
+                        max_page: int):
+        """记录某一页的jm号
+
+        参数:
+            qq_id: 用户QQ号
+            username: JM用户名
+            page: 页码
+            page_size: 每页本子数
+            album_ids: 该页按顺序排列的jm号
+            max_page: 最大页码
+        """
+        record = await cls.get_record(qq_id, username)
+        stored = record.get_album_ids()
+        start = (page - 1) * page_size
+        if len(stored) < start:
+            stored.extend([UNKNOWN_ALBUM] * (start - len(stored)))
+        stored[start:start + page_size] = album_ids
+        if page >= max_page:
+            # 最后一页之后不再有本子
+            del stored[start + len(album_ids):]
+        record.set_album_ids(stored)
+        record.max_page = max_page
+        if page == 1:
+            record.synced_at = time.time()
+        await record.save()
+
+    @classmethod
+    async def clear(cls, qq_id: str):
+        """删除用户的收藏夹记录, 下次同步时重新记录
+
+        参数:
+            qq_id: 用户QQ号
+        """
+        await cls.filter(qq_id=qq_id).delete()
@@ -0,0 +1,135 @@
+import re
+from dataclasses import dataclass, field
+
+from typing import Any
+
+from .util import DEFAULT_BACKEND, HTMLParserUtil
+
+# profile中不属于xp分布的行
+PROFILE_ROW_KEYWORDS = ("称号", "等级", "可收藏数", "J Coins", "勋章")
+
+
+@dataclass
+class FavouriteProfile:
+    """
+    用户JM账户信息
+    :param appellation: 等级称号
+    :param level: 等级
+    :param exp: 等级进度
+    :param jcoins: J Coins数量
+    :param xp_power: xp分布(战斗力)
+    """
+    appellation: str = ""
+    level: int = 0
+    exp: str = ""
+    jcoins: int = 0
+    xp_power: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class FavouriteAlbum:
+    """
+    收藏夹页面中的本子
+    :param album_id: 本子jm号(纯数字)
+    :param title: 标题
+    :param cover_url: 封面地址
+    """
+    album_id: str
+    title: str
+    cover_url: str
+
+
+@dataclass
+class FavouritePageData:
+    """
+    一次解析收藏夹页面得到的全部数据
+    :param profile: 用户信息
+    :param albums: 按页面顺序排列的本子
+    :param max_page: 最大页码
+    """
+    profile: FavouriteProfile
+    albums: list[FavouriteAlbum]
+    max_page: int
+
+
+def _first(values: list[str]) -> str:
+    return values[0] if values else ""
+
+
+def _row_value(util: HTMLParserUtil, row: Any) -> str:
+    return _first(util.extract('div', 'class', 'header-profile-row-value', 'contains', root=row))
+
+
+def _strip_html_tail(value: str, marker: str) -> str:
+    """
+    去掉空白并截断到第一个marker之前(值后面跟随的注释或标签)
+    """
+    value = re.sub(r'\s+', '', value)
+    if value.find(marker) > 0:
+        value = value[:value.find(marker)]
+    return value
+
+
+def parse_profile(util: HTMLParserUtil) -> FavouriteProfile:
+    """
+    解析用户JM账户信息, 每个字段取第一个包含对应关键词的profile行
+    """
+    profile = FavouriteProfile()
+    found = set()
+    for row in util.extract_nodes('div', 'class', 'header-profile-row', 'exact'):
+        html = util.inner_html(row)
+        if "称号" in html and "称号" not in found:
+            found.add("称号")
+            profile.appellation = _strip_html_tail(_row_value(util, row).split(" ")[0], "<!--")
+        if "等级" in html and "等级" not in found:
+            found.add("等级")
+            profile.level = int(_strip_html_tail(_row_value(util, row), "<span"))
+            profile.exp = _first(util.extract('span', 'class', 'header-profile-exp', 'contains', root=row))
+        if "J Coins" in html and "J Coins" not in found:
+            found.add("J Coins")
+            jcoins = _row_value(util, row)
+            if jcoins:
+                profile.jcoins = int(jcoins)
+        if not any(keyword in html for keyword in PROFILE_ROW_KEYWORDS):
+            xp_title = _first(util.extract('div', 'class', 'header-profile-row-name', 'contains', root=row))
+            xp_value = _row_value(util, row)
+            if xp_title and xp_value:
+                try:
+                    profile.xp_power[xp_title] = int(xp_value)
+                except ValueError:
+                    pass
+    return profile
+
+
+def parse_albums(util: HTMLParserUtil) -> list[FavouriteAlbum]:
+    """
+    解析收藏夹中的本子, 没有封面地址的条目会被跳过
+    """
+    albums = []
+    for item in util.extract_nodes('div', 'id', 'favorites_album_', 'start'):
+        cover_url = _first(util.extract('img', 'src', root=item))
+        match = re.search(r'/albums/(\d+)', cover_url)
+        if match is None:
+            continue
+        title = _first(util.extract('div', 'class', 'video-title', 'contains', root=item))
+        albums.append(FavouriteAlbum(album_id=match.group(1), title=title, cover_url=cover_url))
+    return albums
+
+
+def parse_max_page(util: HTMLParserUtil) -> int:
+    """
+    解析最大页码, 没有分页时只有一页
+    """
+    page_numbers = [page_number
+                    for pagination in util.extract_nodes('ul', 'class', 'pagination', 'exact')
+                    for page_number in util.extract('a', 'href', '?page=', 'contains', root=pagination)]
+    return max((int(s) for s in page_numbers if s.isdigit()), default=1)
+
+
+def parse_favourite_page(html: str, backend: str = DEFAULT_BACKEND) -> FavouritePageData:
+    """
+    只解析一次收藏夹页面, 提取用户信息、本子列表和最大页码
+    :param backend: HTMLParserUtil的解析后端
+    """
+    util = HTMLParserUtil(html, backend)
+    return FavouritePageData(profile=parse_profile(util), albums=parse_albums(util), max_page=parse_max_page(util))
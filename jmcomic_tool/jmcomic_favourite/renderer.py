@@ -0,0 +1,264 @@
+import os
+from dataclasses import dataclass
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+
+from ..jmcomic_common import assets, encode_image, render_logger, wrap_text
+
+# 素材目录
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 基础参数配置
+AVATAR_SIZE = (369, 369)  # 头像尺寸
+AVATAR_POS = (143, 74)  # 头像位置
+USER_NAME_POS = (619, 52)  # 用户名位置
+LEVEL_POS = (619, 190)  # 等级的位置
+APPELLATION_POS = (619, 292)  # 称号的位置
+JCOIN_POS = (619, 394)  # J Coins的位置
+XP_POWER_TITLE_POS = (2060, 52)  # 战力分布标题位置
+XP_POS = ((2060, 212), (2060, 308), (2060, 404))  # 前三的XP位置
+PAGE_POS = (1212, 3900)  # 页码位置
+COVER_SIZE = (400, 533)  # 封面尺寸
+COLS = 5  # 每行数量
+ROWS = 4  # 总行数
+SPACING = 80  # 元素间距
+PADDING = 200  # 画布四周边距
+FONT_COLOR = (0, 0, 0)  # 字体颜色
+TEXT_MARGIN = 20  # 文字区域左右边距
+ID_HEIGHT = 80  # ID显示区域高度
+HEADER_HEIGHT = 300  # 头部信息区域高度
+TEXT_BG_HEIGHT = 170  # 标题背景高度
+# 本子网格的起始高度, 头部图层只包含此高度以上的部分
+GRID_TOP = PADDING + HEADER_HEIGHT + 80
+
+# 计算单元尺寸
+CELL_WIDTH = COVER_SIZE[0]
+CELL_HEIGHT = ID_HEIGHT + COVER_SIZE[1] + 120  # 封面高度 + 标题区域高度
+
+
+@dataclass(frozen=True)
+class FavouriteHeaderSpec:
+    """
+    收藏夹图片头部(同一用户各页相同), 可哈希, 内容变化即为新版本
+    :param username: JM用户名
+    :param level: 等级
+    :param exp: 等级进度
+    :param appellation: 称号
+    :param jcoins: J Coins数量
+    :param xp_top: 最高的三项xp (名称, 数值)
+    :param avatar: QQ头像
+    """
+    username: str
+    level: int
+    exp: str
+    appellation: str
+    jcoins: int
+    xp_top: tuple[tuple[str, int], ...]
+    avatar: bytes | None
+
+
+@dataclass(frozen=True)
+class FavouritePageSpec:
+    """
+    收藏夹图片的渲染描述, 只包含可序列化的数据, 可以交给渲染进程执行
+    :param header: 头部
+    :param albums: 每个本子的(显示的jm号, 标题)
+    :param page: 当前页码
+    :param max_page: 最大页码
+    :param output_format: 输出格式 jpeg / webp / png
+    :param quality: 初始压缩质量
+    :param output_kb: 目标大小(KB)
+    :param output_width: 输出宽度, 0表示保持原尺寸
+    """
+    header: FavouriteHeaderSpec
+    albums: tuple[tuple[str, str], ...]
+    page: int
+    max_page: int
+    output_format: str = "png"
+    quality: int = 90
+    output_kb: int = 2048
+    output_width: int = 0
+
+
+def top_xp(xp_power: dict[str, int], count: int = 3) -> tuple[tuple[str, int], ...]:
+    """
+    数值最高的count项xp, 数值相同时保持原顺序
+    """
+    return tuple(sorted(((k, v) for k, v in xp_power.items() if v > 0), key=lambda item: -item[1])[:count])
+
+
+def _font(name: str, size: int):
+    return assets.font(f"{ASSET_DIR}/{name}", size)
+
+
+def _load_avatar(avatar: bytes | None) -> Image.Image:
+    try:
+        # 尝试加载用户头像
+        if avatar:
+            return Image.open(BytesIO(avatar)).resize(AVATAR_SIZE)
+        # 如果没有提供头像数据，直接使用默认
+        raise FileNotFoundError("Avatar data is empty")
+    except Exception as e:
+        render_logger.error(f"头像加载失败: {str(e)}")
+    try:
+        # 尝试加载本地默认头像
+        return assets.image(f"{ASSET_DIR}/avatar.png", "RGB").resize(AVATAR_SIZE)
+    except Exception:
+        # 创建纯色替代头像
+        avatar_img = Image.new("RGB", AVATAR_SIZE, (200, 200, 200))  # 浅灰色背景
+        ImageDraw.Draw(avatar_img).text(
+            (AVATAR_SIZE[0] // 2 - 40, AVATAR_SIZE[1] // 2 - 20),  # 居中显示
+            "头像缺失",
+            fill=(0, 0, 0),
+            font=_font("msyh.ttc", 30)
+        )
+        return avatar_img
+
+
+def render_header(header: FavouriteHeaderSpec) -> Image.Image:
+    """
+    绘制头部(头像、用户名、等级、称号、J Coins、战力分布)并与背景合成, 只保留网格以上的部分
+    """
+    canvas_base = assets.image(f"{ASSET_DIR}/jmcomic_favourite_background.png")
+    width = canvas_base.width
+    canvas_base = canvas_base.crop((0, 0, width, GRID_TOP))
+    canvas = Image.new("RGBA", canvas_base.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(canvas)
+    user_title_font = _font("baibaipanpanwudikeai.ttf", 127)
+    user_profile_font = _font("baibaipanpanwudikeai.ttf", 77)
+    user_xp_font = _font("baibaipanpanwudikeai.ttf", 69)
+
+    # 绘制头像
+    canvas.paste(_load_avatar(header.avatar), AVATAR_POS)
+    # 绘制用户名
+    draw.text(USER_NAME_POS, header.username, font=user_title_font, fill=(0, 0, 0))
+    # 绘制等级
+    draw.text(LEVEL_POS, f"Level    {str(header.level)}{header.exp}", font=user_profile_font, fill=(0, 0, 0))
+    # 绘制称号
+    draw.text(APPELLATION_POS, f"称号    {header.appellation}", font=user_profile_font, fill=(0, 0, 0))
+    # 绘制J Coins
+    draw.text(JCOIN_POS, f"J Coins    {str(header.jcoins)}", font=user_profile_font, fill=(0, 0, 0))
+    # 绘制战力分布
+    draw.text(XP_POWER_TITLE_POS, f"战力分布", font=user_title_font, fill=(0, 0, 0))
+    # 绘制XP
+    for pos, (xp_title, xp_value) in zip(XP_POS, header.xp_top):
+        draw.text(pos, f"{xp_title}  {str(xp_value)}", font=user_xp_font, fill=(0, 0, 0))
+    return Image.alpha_composite(canvas_base, canvas)
+
+
+def get_header(header: FavouriteHeaderSpec) -> Image.Image:
+    """
+    获取缓存的头部图层(约6MB), 在素材缓存中按头部内容缓存
+    每个渲染进程各自缓存, 同一用户的各页分散到不同进程时每个进程各绘制一次
+    """
+    return assets.layer(("favourite_header", header), lambda: render_header(header))
+
+
+def draw_rounded_rectangle(draw, bbox, radius, fill=None, outline=None):
+    """
+    绘制圆角矩形
+    :param draw: ImageDraw 对象
+    :param bbox: 矩形区域 (x0, y0, x1, y1)
+    :param radius: 圆角半径（像素）
+    :param fill: 填充颜色（支持RGBA）
+    :param outline: 边框颜色（支持RGBA）
+    """
+    x0, y0, x1, y1 = bbox
+    height = abs(y1 - y0)
+
+    # 自动调整半径防止过大
+    radius = min(radius, height // 2, (x1 - x0) // 2)
+
+    # 绘制四个角的圆弧
+    draw.ellipse((x0, y0, x0 + radius * 2, y0 + radius * 2), fill=fill, outline=outline)  # 左上
+    draw.ellipse((x1 - radius * 2, y0, x1, y0 + radius * 2), fill=fill, outline=outline)  # 右上
+    draw.ellipse((x0, y1 - radius * 2, x0 + radius * 2, y1), fill=fill, outline=outline)  # 左下
+    draw.ellipse((x1 - radius * 2, y1 - radius * 2, x1, y1), fill=fill, outline=outline)  # 右下
+
+    # 填充中间区域
+    draw.rectangle((x0 + radius, y0, x1 - radius, y1), fill=fill, outline=outline)
+    draw.rectangle((x0, y0 + radius, x1, y1 - radius), fill=fill, outline=outline)
+
+
+def draw_grid(canvas: Image.Image, spec: FavouritePageSpec, covers: list[bytes]):
+    """
+    在透明图层上绘制本子网格和页码
+    """
+    draw = ImageDraw.Draw(canvas)
+    title_font = _font("msyh.ttc", 30)
+    id_font = _font("msyh.ttc", 42)
+    page_font = _font("baibaipanpanwudikeai.ttf", 97)
+
+    # 遍历所有作品
+    for index, ((album_id, title), cover_data) in enumerate(zip(spec.albums, covers)):
+        # 计算位置
+        row = index // COLS
+        col = index % COLS
+        x = col * (CELL_WIDTH + SPACING) + PADDING
+        y = row * (CELL_HEIGHT + SPACING) + GRID_TOP
+
+        # 计算ID文本位置（居中显示）
+        id_width = id_font.getlength(album_id)
+        id_x = x + (COVER_SIZE[0] - id_width) // 2
+        id_y = y + (ID_HEIGHT - id_font.size) // 2
+
+        # 绘制ID文本
+        draw.text((id_x, id_y), album_id, font=id_font, fill=(50, 50, 50))  # 深灰色
+
+        # 处理封面
+        try:
+            cover = Image.open(BytesIO(cover_data)).resize(COVER_SIZE)
+            canvas.paste(cover, (x, y + ID_HEIGHT))
+        except Exception:
+            # 封面加载失败时显示红色占位
+            cover = Image.new('RGB', COVER_SIZE, (255, 0, 0))
+            canvas.paste(cover, (x, y + ID_HEIGHT))
+
+        # 智能换行处理
+        max_text_width = COVER_SIZE[0] - 2 * TEXT_MARGIN
+        wrapped_lines = wrap_text(title, title_font, max_text_width, max_lines=4)
+
+        # 绘制文字背景
+        rect_bbox = (
+            x,
+            y + COVER_SIZE[1] + ID_HEIGHT,
+            x + COVER_SIZE[0],
+            y + COVER_SIZE[1] + TEXT_BG_HEIGHT + ID_HEIGHT
+        )
+        draw_rounded_rectangle(draw=draw, bbox=rect_bbox, radius=20, fill=(0, 0, 0, 20), outline=None)
+
+        # 绘制文字
+        line_height = title_font.size + 5
+        for i, line in enumerate(wrapped_lines):
+            if not line:  # 跳过空行
+                continue
+            text_y = y + COVER_SIZE[1] + ID_HEIGHT + 10 + i * line_height
+            draw.text((x + TEXT_MARGIN, text_y), line, font=title_font, fill=FONT_COLOR)
+
+    # 绘制页码
+    draw.text(PAGE_POS, f"{spec.page}/{spec.max_page}", font=page_font, fill=(10, 115, 212))
+
+
+def render_favourite_page(spec: FavouritePageSpec, covers: list[bytes]) -> Image.Image:
+    """
+    渲染收藏夹图片: 背景与网格合成后贴上缓存的头部图层
+    :param covers: 按本子顺序排列的封面二进制数据
+    """
+    canvas_base = assets.image(f"{ASSET_DIR}/jmcomic_favourite_background.png")
+    canvas = Image.new("RGBA", canvas_base.size, (0, 0, 0, 0))
+    draw_grid(canvas, spec, covers)
+    result = Image.alpha_composite(canvas_base, canvas)
+    result.paste(get_header(spec.header), (0, 0))
+    return result
+
+
+def render_favourite_image(spec: FavouritePageSpec, covers: list[bytes]) -> bytes | None:
+    """
+    渲染收藏夹图片并按spec中的输出设置编码, 可在渲染进程中执行
+    """
+    image = render_favourite_page(spec, covers)
+    target_size = None
+    if 0 < spec.output_width < image.width:
+        target_size = (spec.output_width, round(image.height * spec.output_width / image.width))
+    return encode_image(image, spec.output_format, target_size, spec.output_kb, spec.quality)
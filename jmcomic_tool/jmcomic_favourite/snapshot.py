@@ -0,0 +1,209 @@
+import asyncio
+import csv
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from zhenxun.configs.path_config import DATA_PATH
+from zhenxun.services.log import logger
+
+from .config import PARSER_BACKEND, SNAPSHOT_CONCURRENCY
+from .data_source import JmFavouritePage
+from .parser import FavouriteAlbum, parse_favourite_page
+from ..jmcomic_common import cover_fetcher
+
+# 快照保存目录
+SNAPSHOT_PATH = DATA_PATH / "jmcomic" / "favourite_snapshots"
+# 导出文件目录
+EXPORT_PATH = DATA_PATH / "jmcomic" / "favourite_exports"
+# 封面哈希长度
+COVER_HASH_LENGTH = 16
+
+
+@dataclass(frozen=True)
+class SnapshotAlbum:
+    """
+    快照中的本子
+    :param album_id: 本子jm号(纯数字)
+    :param title: 标题
+    :param cover_hash: 封面sha1前16位, 封面获取失败时为空
+    """
+    album_id: str
+    title: str
+    cover_hash: str = ""
+
+
+def _write_json(path: Path, data):
+    """
+    原子写入json(阻塞)
+    """
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+@dataclass
+class FavouriteSnapshot:
+    """
+    用户收藏夹快照, 按页保存, 未完成的快照下次继续获取缺少的页
+    存储于DATA_PATH/jmcomic/favourite_snapshots/{uid}/, 每页一个文件, manifest.json记录账号和最大页码,
+    获取一页只写入该页和manifest
+    """
+    uid: str
+    username: str
+    max_page: int = 0
+    # 页码 -> 该页的本子
+    pages: dict[int, list[SnapshotAlbum]] = field(default_factory=dict)
+    updated_at: float = 0
+
+    @property
+    def path(self) -> Path:
+        return SNAPSHOT_PATH / self.uid
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.path / "manifest.json"
+
+    def page_path(self, page: int) -> Path:
+        return self.path / "pages" / f"{page}.json"
+
+    @property
+    def complete(self) -> bool:
+        return self.max_page > 0 and all(page in self.pages for page in range(1, self.max_page + 1))
+
+    def missing_pages(self) -> list[int]:
+        return [page for page in range(1, self.max_page + 1) if page not in self.pages]
+
+    def albums(self) -> list[SnapshotAlbum]:
+        """
+        按收藏夹顺序排列的本子, 获取期间收藏变化导致的跨页重复只保留第一次出现
+        """
+        seen = set()
+        result = []
+        for page in sorted(self.pages):
+            for album in self.pages[page]:
+                if album.album_id not in seen:
+                    seen.add(album.album_id)
+                    result.append(album)
+        return result
+
+    def reset(self, max_page: int):
+        """
+        丢弃已获取的页(阻塞, 删除页文件)
+        """
+        self.max_page = max_page
+        self.pages = {}
+        for path in (self.path / "pages").glob("*.json"):
+            path.unlink(missing_ok=True)
+        self.save_manifest()
+
+    @classmethod
+    def load(cls, uid: str, username: str) -> "FavouriteSnapshot":
+        """
+        读取快照(阻塞), 不存在、损坏或换了账号时返回空快照, 损坏的页视为缺少
+        """
+        snapshot = cls(uid=uid, username=username)
+        try:
+            manifest = json.loads(snapshot.manifest_path.read_text(encoding="utf-8"))
+            if manifest.get("username") != username:
+                return snapshot
+            snapshot.max_page = manifest["max_page"]
+            snapshot.updated_at = manifest.get("updated_at", 0)
+        except FileNotFoundError:
+            return snapshot
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"jm收藏夹快照读取失败 {uid}: {e}")
+            return snapshot
+        for page in range(1, snapshot.max_page + 1):
+            try:
+                albums = json.loads(snapshot.page_path(page).read_text(encoding="utf-8"))
+                snapshot.pages[page] = [SnapshotAlbum(*album) for album in albums]
+            except FileNotFoundError:
+                continue
+            except (ValueError, TypeError) as e:
+                logger.warning(f"jm收藏夹快照 {uid} 第{page}页读取失败: {e}")
+        return snapshot
+
+    def save_manifest(self):
+        """
+        原子写入manifest(阻塞)
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        _write_json(self.manifest_path, {"username": self.username, "max_page": self.max_page,
+                                         "updated_at": self.updated_at})
+
+    def save_page(self, page: int):
+        """
+        原子写入一页和manifest(阻塞)
+        """
+        self.page_path(page).parent.mkdir(parents=True, exist_ok=True)
+        _write_json(self.page_path(page),
+                    [[album.album_id, album.title, album.cover_hash] for album in self.pages[page]])
+        self.save_manifest()
+
+
+async def _snapshot_albums(albums: list[FavouriteAlbum]) -> list[SnapshotAlbum]:
+    """
+    获取封面并计算哈希, 封面通过共享连接池获取, 不写入封面缓存
+    """
+    covers = await cover_fetcher.fetch_many([album.album_id for album in albums], cache=False)
+    return [SnapshotAlbum(album_id=album.album_id, title=album.title,
+                          cover_hash=hashlib.sha1(cover).hexdigest()[:COVER_HASH_LENGTH] if cover else "")
+            for album, cover in zip(albums, covers)]
+
+
+async def build_snapshot(uid: str, jm_username: str, jm_password: str, refresh: bool = False) -> FavouriteSnapshot:
+    """
+    获取收藏夹所有页, 最多同时请求SNAPSHOT_CONCURRENCY页, 所有页共用同一个已登录的客户端
+    每获取一页只保存该页; 已有快照的第一页和最大页码没有变化时只获取缺少的页
+    获取失败的页留到下次继续, 返回的快照可能不完整
+    :param refresh: 是否丢弃已有快照重新获取
+    """
+    snapshot = await asyncio.to_thread(FavouriteSnapshot.load, uid, jm_username)
+    first = await JmFavouritePage(uid, 1, jm_username, jm_password).async_init()
+    head = await _snapshot_albums(first.page_data.albums)
+    if (refresh or first.max_page != snapshot.max_page
+            or [album.album_id for album in snapshot.pages.get(1, [])] != [album.album_id for album in head]):
+        # 收藏有变化时后面的页都会移动, 已获取的页不再可用
+        await asyncio.to_thread(snapshot.reset, first.max_page)
+    snapshot.pages[1] = head
+    snapshot.updated_at = time.time()
+    await asyncio.to_thread(snapshot.save_page, 1)
+
+    semaphore = asyncio.Semaphore(SNAPSHOT_CONCURRENCY)
+    save_lock = asyncio.Lock()
+
+    async def fetch(page: int):
+        async with semaphore:
+            html = await asyncio.to_thread(first.fetch_html, page)
+            page_data = await asyncio.to_thread(parse_favourite_page, html, PARSER_BACKEND)
+            if not page_data.albums:
+                raise ValueError("页面中没有本子")
+            albums = await _snapshot_albums(page_data.albums)
+        async with save_lock:
+            snapshot.pages[page] = albums
+            snapshot.updated_at = time.time()
+            await asyncio.to_thread(snapshot.save_page, page)
+
+    missing = snapshot.missing_pages()
+    results = await asyncio.gather(*(fetch(page) for page in missing), return_exceptions=True)
+    for page, result in zip(missing, results):
+        if isinstance(result, Exception):
+            logger.warning(f"jm收藏夹快照 {uid} 第{page}页获取失败", e=result)
+    return snapshot
+
+
+def export_csv(snapshot: FavouriteSnapshot) -> Path:
+    """
+    导出为csv(带BOM, 可直接用Excel打开)
+    """
+    EXPORT_PATH.mkdir(parents=True, exist_ok=True)
+    path = EXPORT_PATH / f"jm_favourite_{snapshot.uid}_{int(snapshot.updated_at)}.csv"
+    with path.open("w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["序号", "jm号", "标题", "封面哈希"])
+        for index, album in enumerate(snapshot.albums(), start=1):
+            writer.writerow([index, album.album_id, album.title, album.cover_hash])
+    return path
@@ -0,0 +1,190 @@
+import asyncio
+import time
+import weakref
+from pathlib import Path
+from typing import ClassVar
+
+from zhenxun.models.jm_account import JmAccount
+from zhenxun.services.log import logger
+
+from .config import OUTPUT_FORMAT, SYNC_BATCH, SYNC_STALE_AFTER
+from .avatar import avatar_cache
+from .data_source import BASE_PATH, MAX_ALBUM_NUMBER, JmFavouritePage
+from .favourite_record import UNKNOWN_ALBUM, JmFavouriteRecord
+from ..jmcomic_common import IMAGE_EXTENSIONS
+
+
+def cache_path(uid: str, page: int) -> Path:
+    """
+    收藏夹图片缓存路径 {uid}_{page}.{扩展名}, 扩展名取决于配置的输出格式
+    """
+    return Path() / f"{BASE_PATH}/{uid}_{page}.{IMAGE_EXTENSIONS.get(OUTPUT_FORMAT, 'png')}"
+
+
+def cached_files(uid: str) -> dict[int, list[Path]]:
+    """
+    已缓存的图片, 包括修改输出格式前生成的其他格式
+    :return: 页码 -> 图片路径
+    """
+    extensions = {f".{extension}" for extension in IMAGE_EXTENSIONS.values()}
+    files: dict[int, list[Path]] = {}
+    for path in (Path() / BASE_PATH).glob(f"{uid}_*.*"):
+        page = path.stem[len(uid) + 1:]
+        if path.suffix in extensions and page.isdigit():
+            files.setdefault(int(page), []).append(path)
+    return files
+
+
+def cached_pages(uid: str) -> list[int]:
+    """
+    已缓存图片的页码
+    """
+    return sorted(cached_files(uid))
+
+
+def merge_head(head: list[str], stored: list[str]) -> list[str]:
+    """
+    用新的第一页推算完整收藏列表
+    新收藏出现在开头, 已保存列表中第一页最后一个仍存在的本子之后的部分保持不变, 第一页的本子不会在后面重复出现
+    第一页与已保存列表没有重叠时(新收藏超过一页)无法确定新收藏的数量, 第一页之后全部视为未知, 所有已缓存的页重新生成
+    """
+    last = -1
+    for album_id in head:
+        if album_id in stored:
+            last = max(last, stored.index(album_id))
+    if last < 0:
+        return list(head)
+    head_ids = set(head)
+    return head + [album_id for album_id in stored[last + 1:] if album_id not in head_ids]
+
+
+def affected_pages(old: list[str], new: list[str], old_max_page: int, new_max_page: int) -> list[int]:
+    """
+    内容发生变化的页码
+    两个列表中该页有未知位置时视为变化; 第一页没有变化但最大页码变化(后面的本子被取消收藏)时无法定位, 除第一页外都视为变化
+    """
+    if old == new and old_max_page == new_max_page:
+        return []
+    pages = []
+    for page in range(1, max(old_max_page, new_max_page) + 1):
+        start = (page - 1) * MAX_ALBUM_NUMBER
+        old_slice = old[start:start + MAX_ALBUM_NUMBER]
+        new_slice = new[start:start + MAX_ALBUM_NUMBER]
+        if (old_slice != new_slice or UNKNOWN_ALBUM in new_slice or not new_slice
+                or (old == new and page > 1)):
+            pages.append(page)
+    return pages
+
+
+class FavouriteSync:
+    """
+    收藏夹增量同步
+    只请求第一页与数据库中保存的收藏列表比较, 推算出变化的页, 只重新生成其中已缓存的图片
+    """
+    # uid -> 锁, 同一用户同时只进行一次同步或生成; 没有任务持有或等待时锁被回收
+    _locks: ClassVar[weakref.WeakValueDictionary[str, asyncio.Lock]] = weakref.WeakValueDictionary()
+
+    @classmethod
+    def _lock(cls, uid: str) -> asyncio.Lock:
+        lock = cls._locks.get(uid)
+        if lock is None:
+            lock = asyncio.Lock()
+            cls._locks[uid] = lock
+        return lock
+
+    @classmethod
+    async def render(cls, fpage: JmFavouritePage) -> Path | None:
+        """
+        生成收藏夹图片并保存, 同时记录该页的jm号
+        """
+        async with cls._lock(fpage.uid):
+            return await cls._render(fpage)
+
+    @staticmethod
+    async def _render(fpage: JmFavouritePage) -> Path | None:
+        image = await fpage.create_page_img()
+        if image is None:
+            return None
+        path = cache_path(fpage.uid, fpage.page)
+        await asyncio.to_thread(path.absolute().write_bytes, image)
+        # 删除该页其他格式的旧图片
+        for old_path in cached_files(fpage.uid).get(fpage.page, []):
+            if old_path != path:
+                old_path.unlink(missing_ok=True)
+        await JmFavouriteRecord.save_page(fpage.uid, fpage.jm_username, fpage.page, MAX_ALBUM_NUMBER,
+                                          [album.album_id for album in fpage.page_data.albums], fpage.max_page)
+        return path
+
+    @classmethod
+    async def sync(cls, uid: str, jm_username: str, jm_password: str, self_id: str | None = None) -> list[int]:
+        """
+        同步用户收藏夹, 只在需要重新生成图片时获取头像
+        :param self_id: 获取头像使用的bot id
+        :return: 重新生成的页码
+        """
+        async with cls._lock(uid):
+            record = await JmFavouriteRecord.get_record(uid, jm_username)
+            stored = record.get_album_ids()
+            first = await JmFavouritePage(uid, 1, jm_username, jm_password).async_init()
+            head = [album.album_id for album in first.page_data.albums]
+            merged = merge_head(head, stored)
+            pages = affected_pages(stored, merged, record.max_page, first.max_page)
+
+            record.set_album_ids(merged)
+            record.max_page = first.max_page
+            record.synced_at = time.time()
+            await record.save()
+
+            cached = cached_files(uid)
+            for page, paths in cached.items():
+                if page > first.max_page:
+                    for path in paths:
+                        path.unlink(missing_ok=True)
+            rendered = []
+            pages = [page for page in pages if page in cached and page <= first.max_page]
+            avatar = await avatar_cache.get(uid, self_id) if pages else None
+            first.set_avatar(avatar)
+            for page in pages:
+                if page == 1:
+                    fpage = first
+                else:
+                    # 复用第一页已登录的客户端
+                    fpage = await JmFavouritePage(uid, page, jm_username, jm_password,
+                                                  client=first.client).async_init()
+                    fpage.set_avatar(avatar)
+                if fpage.check() and await cls._render(fpage) is not None:
+                    rendered.append(page)
+            return rendered
+
+    @classmethod
+    async def rebuild(cls, uid: str, jm_username: str) -> bool:
+        """
+        删除用户的缓存图片、最大页码缓存和收藏记录, 之后的查看和同步重新开始
+        :return: 缓存图片是否删除成功
+        """
+        async with cls._lock(uid):
+            JmFavouritePage.invalidate_max_page(jm_username)
+            await JmFavouriteRecord.clear(uid)
+            return await JmFavouritePage.clear_cache(uid)
+
+    @classmethod
+    async def sync_stale(cls):
+        """
+        同步超过SYNC_STALE_AFTER秒未同步且有缓存图片的用户, 每次最多SYNC_BATCH个
+        """
+        records = await JmFavouriteRecord.filter(synced_at__lt=time.time() - SYNC_STALE_AFTER).order_by("synced_at")
+        synced = 0
+        for record in records:
+            if synced >= SYNC_BATCH:
+                break
+            if not cached_pages(record.qq_id):
+                continue
+            jm_account = await JmAccount.get_user(record.qq_id)
+            if jm_account.id == -1:
+                continue
+            synced += 1
+            try:
+                pages = await cls.sync(record.qq_id, jm_account.username, jm_account.password)
+                logger.info(f"jm收藏夹定时同步 {record.qq_id}, 重新生成 {pages}")
+            except Exception as e:
+                logger.warning(f"jm收藏夹定时同步失败 {record.qq_id}", e=e)
@@ -1,19 +1,203 @@
-from typing import List
+from functools import lru_cache
+from typing import Any, List
 from typing import Optional
 
+import soupsieve
 from bs4 import BeautifulSoup, Tag
 
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    etree = lxml_html = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# 可用的解析后端: 'html.parser'(bs4纯python) / 'lxml' / 'selectolax'
+BACKENDS = ("html.parser", "lxml", "selectolax")
+# 默认后端, 结果与原实现完全一致
+DEFAULT_BACKEND = "html.parser"
+# 编译后选择器的缓存数量
+SELECTOR_CACHE_SIZE = 256
+# 只返回属性的自闭合标签
+VOID_TAGS = ('img', 'input', 'meta')
+
+# 匹配模式 -> css属性运算符
+_OPERATORS = {
+    'start': '^=',
+    'end': '$=',
+    'contains': '*=',
+    'exact': '='
+}
+
+
+def available_backends() -> tuple[str, ...]:
+    """已安装依赖的解析后端"""
+    return tuple(backend for backend in BACKENDS
+                 if backend == "html.parser"
+                 or (backend == "lxml" and etree is not None)
+                 or (backend == "selectolax" and LexborHTMLParser is not None))
+
+
+@lru_cache(maxsize=SELECTOR_CACHE_SIZE)
+def build_selector(
+        tag_name: str,
+        attr_name: Optional[str],
+        search_str: Optional[str],
+        match_mode: Optional[str]
+) -> Optional[str]:
+    """构建CSS选择器, 不需要匹配属性时返回None"""
+    if not attr_name or not search_str:
+        return None
+    operator = _OPERATORS.get(match_mode, '*=') if match_mode else '='
+    # 转义属性值中的反斜杠和引号
+    value = search_str.replace('\\', '\\\\').replace("'", "\\'")
+    return f"{tag_name}[{attr_name}{operator}'{value}']"
+
+
+@lru_cache(maxsize=SELECTOR_CACHE_SIZE)
+def compile_selector(selector: str) -> soupsieve.SoupSieve:
+    """编译CSS选择器, 相同的选择器只编译一次"""
+    return soupsieve.compile(selector)
+
+
+def _xpath_literal(value: str) -> str:
+    """xpath字符串字面量, 同时包含两种引号时使用concat"""
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in value.split("'")) + ")"
+
+
+@lru_cache(maxsize=SELECTOR_CACHE_SIZE)
+def compile_xpath(
+        tag_name: str,
+        attr_name: Optional[str],
+        search_str: Optional[str],
+        match_mode: Optional[str]
+):
+    """将与build_selector相同的条件编译为xpath, lxml不需要cssselect"""
+    if not attr_name or not search_str:
+        return etree.XPath(f"descendant::{tag_name}")
+    attr = f"@{attr_name}"
+    value = _xpath_literal(search_str)
+    mode = match_mode if match_mode in _OPERATORS else 'contains' if match_mode else 'exact'
+    condition = {
+        'start': f"starts-with({attr}, {value})",
+        'end': f"substring({attr}, string-length({attr}) - string-length({value}) + 1) = {value}",
+        'contains': f"contains({attr}, {value})",
+        'exact': f"{attr} = {value}",
+    }[mode]
+    return etree.XPath(f"descendant::{tag_name}[{condition}]")
+
+
+class _SoupBackend:
+    """BeautifulSoup + html.parser, 结果与原实现完全一致"""
+
+    def __init__(self, html_content: str):
+        self.root = BeautifulSoup(html_content, 'html.parser')
+
+    @staticmethod
+    def select(element: Tag, tag_name, attr_name, search_str, match_mode) -> list:
+        selector = build_selector(tag_name, attr_name, search_str, match_mode)
+        if selector is None:
+            return element.find_all(True if tag_name == '*' else tag_name)
+        return compile_selector(selector).select(element)
+
+    @staticmethod
+    def name(element: Tag) -> str:
+        return element.name
+
+    @staticmethod
+    def attr(element: Tag, attr_name: str) -> str:
+        return element.get(attr_name, '')
+
+    @staticmethod
+    def inner_html(element: Tag) -> str:
+        return ''.join(str(child) for child in element.contents).strip()
+
+
+class _LxmlBackend:
+    """lxml后端, 选择器编译为xpath; 内部html中的注释保留<!-- -->, 自闭合标签不带'/', 其余与bs4一致"""
+
+    def __init__(self, html_content: str):
+        self.root = lxml_html.document_fromstring((html_content or "").strip() or "<html></html>")
+
+    @staticmethod
+    def select(element, tag_name, attr_name, search_str, match_mode) -> list:
+        return compile_xpath(tag_name, attr_name, search_str, match_mode)(element)
+
+    @staticmethod
+    def name(element) -> str:
+        return element.tag
+
+    @staticmethod
+    def attr(element, attr_name: str) -> str:
+        return element.get(attr_name, '')
+
+    @staticmethod
+    def inner_html(element) -> str:
+        # 与bs4一致: 直接子文本保持反转义后的原文, 子元素内部由lxml序列化(转义)
+        return ((element.text or '')
+                + ''.join(etree.tostring(child, encoding=str, method="html", with_tail=False) + (child.tail or '')
+                          for child in element)).strip()
+
+
+class _SelectolaxBackend:
+    """selectolax(lexbor)后端, 选择器由lexbor内部编译"""
 
-class HTMLParserUtil:
     def __init__(self, html_content: str):
-        self.soup = BeautifulSoup(html_content, 'html.parser')
+        self.root = LexborHTMLParser(html_content).root
+
+    @staticmethod
+    def select(element, tag_name, attr_name, search_str, match_mode) -> list:
+        return element.css(build_selector(tag_name, attr_name, search_str, match_mode) or tag_name)
+
+    @staticmethod
+    def name(element) -> str:
+        return element.tag
+
+    @staticmethod
+    def attr(element, attr_name: str) -> str:
+        return element.attributes.get(attr_name) or ''
+
+    @staticmethod
+    def inner_html(element) -> str:
+        return ''.join(child.html or '' for child in element.iter(include_text=True)).strip()
+
+
+def _create_backend(html_content: str, backend: str):
+    if backend not in BACKENDS:
+        raise ValueError(f"不支持的解析后端: {backend}, 可用 {BACKENDS}")
+    if backend not in available_backends():
+        raise ImportError(f"{backend}后端需要安装{backend}")
+    if backend == "selectolax":
+        return _SelectolaxBackend(html_content)
+    if backend == "lxml":
+        return _LxmlBackend(html_content)
+    return _SoupBackend(html_content)
+
+
+class HTMLParserUtil:
+    def __init__(self, html_content: str, backend: str = DEFAULT_BACKEND):
+        """
+        :param html_content: html内容
+        :param backend: 解析后端 'html.parser' / 'lxml' / 'selectolax'
+        """
+        self.backend = backend
+        self._backend = _create_backend(html_content, backend)
 
     def extract(
             self,
             tag_name: str,
             attr_name: Optional[str] = None,
             search_str: Optional[str] = None,
-            match_mode: Optional[str] = None
+            match_mode: Optional[str] = None,
+            root: Any = None
     ) -> List[str]:
         """
         通用HTML内容提取方法
@@ -21,16 +205,36 @@ class HTMLParserUtil:
         :param attr_name: 属性名称（可选）
         :param search_str: 属性值匹配字符串（可选）
         :param match_mode: 匹配模式：'start'/'contains'/'end'/'exact'（可选）
+        :param root: 在extract_nodes返回的节点内部查找(可选), 默认整个页面
         返回结果列表保持HTML原始顺序
         """
-        # 构建CSS选择器
-        selector = self._build_selector(tag_name, attr_name, search_str, match_mode)
+        # 提取内容
+        return [self._extract_content(element, tag_name, attr_name)
+                for element in self.extract_nodes(tag_name, attr_name, search_str, match_mode, root)]
 
-        # 查找所有匹配元素
-        elements = self.soup.select(selector) if selector else self.soup.find_all(tag_name)
+    def extract_nodes(
+            self,
+            tag_name: str,
+            attr_name: Optional[str] = None,
+            search_str: Optional[str] = None,
+            match_mode: Optional[str] = None,
+            root: Any = None
+    ) -> List[Any]:
+        """
+        与extract的匹配规则相同, 返回后端的节点本身而不是内部html字符串
+        嵌套提取时将节点作为root继续查找, 不需要把内部html序列化后重新解析
+        :param root: 在该节点内部查找(可选), 默认整个页面
+        """
+        root = self._backend.root if root is None else root
+        return self._backend.select(root, tag_name, attr_name, search_str, match_mode)
 
-        # 提取内容
-        return [self._extract_content(element, tag_name, attr_name) for element in elements]
+    def inner_html(self, node: Any) -> str:
+        """节点内部html(不包含自身标签), 节点为None时返回空字符串"""
+        return '' if node is None else self._backend.inner_html(node)
+
+    def attr(self, node: Any, attr_name: str) -> str:
+        """节点的属性值, 不存在时返回空字符串"""
+        return self._backend.attr(node, attr_name)
 
     def _build_selector(
             self,
@@ -40,32 +244,21 @@ class HTMLParserUtil:
             match_mode: Optional[str]
     ) -> Optional[str]:
         """构建CSS选择器"""
-        if not attr_name or not search_str:
-            return None
-
-        operators = {
-            'start': '^=',
-            'end': '$=',
-            'contains': '*=',
-            'exact': '='
-        }
-        operator = operators.get(match_mode, '*=') if match_mode else '='
+        return build_selector(tag_name, attr_name, search_str, match_mode)
 
-        return f"{tag_name}[{attr_name}{operator}'{search_str}']"
-
-    def _extract_content(self, element: Tag, tag_name: str, attr_name: Optional[str]) -> str:
+    def _extract_content(self, element: Any, tag_name: str, attr_name: Optional[str]) -> str:
         """根据标签类型提取内容"""
         # 自闭合标签或需要返回属性的情况
-        if element.name in ('img', 'input', 'meta'):
-            return element.get(attr_name, '') if attr_name else ''
+        if self._backend.name(element) in VOID_TAGS:
+            return self._backend.attr(element, attr_name) if attr_name else ''
 
         # 提取完整内部HTML（不包含自身标签）
-        return ''.join(str(child) for child in element.contents).strip()
+        return self._backend.inner_html(element)
 
     @property
-    def original_order(self) -> List[Tag]:
+    def original_order(self) -> List[Any]:
         """获取原始顺序的所有元素（调试用）"""
-        return self.soup.find_all()
+        return self._backend.select(self._backend.root, '*', None, None, None)
 
     @staticmethod
     def join_results(results: List[str], separator: str = "") -> str:
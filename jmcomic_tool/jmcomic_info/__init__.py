@@ -20,8 +20,9 @@ from nonebot_plugin_uninfo import Uninfo
 from zhenxun.configs.utils import PluginCdBlock, PluginExtraData
 from zhenxun.services.log import logger
 from zhenxun.utils.message import MessageUtils
+from .album_formatter import AlbumFormatter, GITHUB_NOTICE
 from .data_for_album import DataForAlbum
-from .data_source import JmDownload, cl, JmModuleConfig
+from .data_source import AlbumDetailCache, JmDownload, cl, JmModuleConfig
 
 __plugin_meta__ = PluginMetadata(
     name="Jm信息",
@@ -327,74 +328,44 @@ def create_image_gallery_html(image_paths, descriptions_data, filename="photo_ga
 @_mul_info_matcher.handle()
 async def __(bot: Bot, session: Uninfo, arparma: Arparma, album_id: UniMessage):
     await MessageUtils.build_message(f"正在解析中，请稍后...\n"
-                                     f"本插件及其相关已在GitHub开源, 详见: https://github.com/JUKOMU/zhenxun_bot_plugins_jukomu_dev").send(
+                                     f"{GITHUB_NOTICE}").send(
         reply_to=True)
     list = filter_duplicate_numbers(extract_numbers(album_id.extract_plain_text()))
     image_urls = []
     descriptions_structured = []
     for id in list:
         try:
-            album = cl.get_album_detail(id)
+            album = await AlbumDetailCache.fetch(id)
         except Exception as e:
             continue
-        # 构造其他标题名
-        other_name = album.name.replace(album.oname, "")
-        try:
-            other_name_result = re.sub(r'\[.*?\]', '', other_name)
-        except Exception as e:
-            other_name_result = ''
-
-        # 构造作者信息
-        author_str = "["
-        for i, value in enumerate(album.authors):
-            if i == 0:
-                author_str = author_str + value
-            else:
-                author_str = author_str + ", " + value
-        author_str = author_str + "]"
-
-        # 构造登场人物信息
-        actor_str = "["
-        for i, value in enumerate(album.actors):
-            if i == 0:
-                actor_str = actor_str + value
-            else:
-                actor_str = actor_str + ", " + value
-        actor_str = actor_str + "]"
-
-        # 构造标签信息
-        tag_str = "["
-        for i, value in enumerate(album.tags):
-            if i == 0:
-                tag_str = tag_str + value
-            else:
-                tag_str = tag_str + ", " + value
-        tag_str = tag_str + "]"
-
         image_urls.append(f'https://{JmModuleConfig.DOMAIN_IMAGE_LIST[0]}/media/albums/{id}_3x4.jpg')
-        descriptions_structured.append(
-            [album.id, f'{album.authoroname}/{other_name_result.strip()}', author_str, actor_str, tag_str])
+        descriptions_structured.append(AlbumFormatter.format(id, album).gallery_row())
     current_timestamp = create_image_gallery_html(
         image_paths=image_urls,
         descriptions_data=descriptions_structured,
     )
-    group_id = session.group.id if session.group else None
-    filename = Path() / "resources" / "html" / "jmcomic" / f'{current_timestamp}.html'
+    await upload_gallery_html(bot, session, current_timestamp)
+
 
+async def upload_file(bot: Bot, session: Uninfo, path: Path, name: str):
+    """
+    将本地文件上传为群文件(私聊为私聊文件)
+    """
+    group_id = session.group.id if session.group else None
     try:
         if group_id:
             await bot.call_api(
                 "upload_group_file",
                 group_id=group_id,
-                file=f"file:///{filename.absolute()}",
-                name=f"{current_timestamp}.html",
+                file=f"file:///{path.absolute()}",
+                name=name,
             )
         else:
             await bot.call_api(
                 "upload_private_file",
                 user_id=session.user.id,
-                file=f"file:///{filename.absolute()}",
-                name=f"{current_timestamp}.html",
+                file=f"file:///{path.absolute()}",
+                name=name,
             )
     except Exception as e:
         logger.error(
@@ -406,8 +377,21 @@ async def __(bot: Bot, session: Uninfo, arparma: Arparma, album_id: UniMessage):
         )
 
 
-@_info_matcher.handle()
-async def get_jm_info(bot: Bot, session: Uninfo, arparma: Arparma, album_id: str) -> UniMessage:
+async def upload_gallery_html(bot: Bot, session: Uninfo, current_timestamp: float | None):
+    """
+    将create_image_gallery_html生成的画廊上传为群文件(私聊为私聊文件)
+    """
+    if current_timestamp is None:
+        return
+    filename = Path() / "resources" / "html" / "jmcomic" / f'{current_timestamp}.html'
+    await upload_file(bot, session, filename, f"{current_timestamp}.html")
+
+
+async def _build_album_info(bot: Bot, session: Uninfo, album_id: str) -> tuple[Path, str]:
+    """
+    下载封面并构建jm信息文本
+    返回封面路径和文本消息
+    """
     group_id = session.group.id if session.group else None
     album_data = DataForAlbum()
     try:
@@ -418,71 +402,14 @@ async def get_jm_info(bot: Bot, session: Uninfo, arparma: Arparma, album_id: str
     album = album_data.get_album()
     album_jpg = f"{album_id}.jpg"
     path = Path() / "resources" / "image" / "jmcomic" / album_jpg
+    text_content = await AlbumFormatter.info_text(album_id, album, JmDownload.get_page_count)
+    return path, text_content
 
-    # 构造其他标题名
-    other_name = album.name.replace(album.oname, "")
-    other_name_result = re.sub(r'\[.*?\]', '', other_name)
-
-    # 构造作者信息
-    author_str = "["
-    for i, value in enumerate(album.authors):
-        if i == 0:
-            author_str = author_str + value
-        else:
-            author_str = author_str + ", " + value
-    author_str = author_str + "]"
-
-    # 构造登场人物信息
-    actor_str = "["
-    for i, value in enumerate(album.actors):
-        if i == 0:
-            actor_str = actor_str + value
-        else:
-            actor_str = actor_str + ", " + value
-    actor_str = actor_str + "]"
-
-    # 构造标签信息
-    tag_str = "["
-    for i, value in enumerate(album.tags):
-        if i == 0:
-            tag_str = tag_str + value
-        else:
-            tag_str = tag_str + ", " + value
-    tag_str = tag_str + "]"
-
-    # 构造章节信息
-    photo_id = ""
-    photo_curr = ""
-    photo_title = ""
-    for i, value in enumerate(album.episode_list):
-        # 章节编号
-        photo_id = value[0]
-        if photo_id == album_id:
-            # 章节序号
-            photo_curr = value[1]
-            # 章节标题
-            photo_title = value[2]
-            break
-    if photo_curr == "":
-        photo_curr = 1
-    photo_num = len(album.episode_list)
-    # 总页数
-    page_count = len(cl.get_photo_detail(album_id).page_arr)
-    logger.info(f"本子信息 {album_id}", arparma.header_result, session=session)
-    # 构建文本消息
-    text_content = (
-        f'本子信息:\n'
-        f'* [{album.id}]\n'
-        f'* {album.authoroname}/{other_name_result.strip()}\n'
-        f'* 作者: {author_str}\n'
-        f'* 登场人物: {actor_str}\n'
-        f'* tags: {tag_str}\n'
-        f'* 章节标题: {photo_title}\n'
-        f'* 页数: {page_count}\n'
-        f'当前为第 {photo_curr} 章, 总章节数: {photo_num}\n'
-        f'本插件及其相关已在GitHub开源, 详见: https://github.com/JUKOMU/zhenxun_bot_plugins_jukomu_dev'
-    )
 
+async def _send_album_info(album_id: str, path: Path, text_content: str):
+    """
+    发送jm信息, 发送失败时依次尝试缩小图片、反转图片、纯文本
+    """
     # 第一次尝试发送原图
     try:
         await MessageUtils.build_message([path, text_content]).send(reply_to=True)
@@ -512,110 +439,18 @@ async def get_jm_info(bot: Bot, session: Uninfo, arparma: Arparma, album_id: str
                 await MessageUtils.build_message([text_content]).send(reply_to=True)
 
 
-@_matcher.handle()
-async def get_jm_info(bot: Bot, session: Uninfo, album_id: str) -> UniMessage | None:
-    group_id = session.group.id if session.group else None
-    album_data = DataForAlbum()
-    try:
-        await JmDownload.download_avatar(bot, session.user.id, group_id, album_id, album_data)
-    except MissingAlbumPhotoException as e:
-        await MessageUtils.build_message(["本子不存在"]).send(
-            reply_to=True)
-    album = album_data.get_album()
-    album_jpg = f"{album_id}.jpg"
-    path = Path() / "resources" / "image" / "jmcomic" / album_jpg
+@_info_matcher.handle()
+async def get_jm_info(bot: Bot, session: Uninfo, arparma: Arparma, album_id: str) -> UniMessage:
+    path, text_content = await _build_album_info(bot, session, album_id)
+    logger.info(f"本子信息 {album_id}", arparma.header_result, session=session)
+    await _send_album_info(album_id, path, text_content)
 
-    # 构造其他标题名
-    other_name = album.name.replace(album.oname, "")
-    other_name_result = re.sub(r'\[.*?\]', '', other_name)
 
-    # 构造作者信息
-    author_str = "["
-    for i, value in enumerate(album.authors):
-        if i == 0:
-            author_str = author_str + value
-        else:
-            author_str = author_str + ", " + value
-    author_str = author_str + "]"
-
-    # 构造登场人物信息
-    actor_str = "["
-    for i, value in enumerate(album.actors):
-        if i == 0:
-            actor_str = actor_str + value
-        else:
-            actor_str = actor_str + ", " + value
-    actor_str = actor_str + "]"
-
-    # 构造标签信息
-    tag_str = "["
-    for i, value in enumerate(album.tags):
-        if i == 0:
-            tag_str = tag_str + value
-        else:
-            tag_str = tag_str + ", " + value
-    tag_str = tag_str + "]"
-
-    # 构造章节信息
-    photo_id = ""
-    photo_curr = ""
-    photo_title = ""
-    for i, value in enumerate(album.episode_list):
-        # 章节编号
-        photo_id = value[0]
-        if photo_id == album_id:
-            # 章节序号
-            photo_curr = value[1]
-            # 章节标题
-            photo_title = value[2]
-            break
-    if photo_curr == "":
-        photo_curr = 1
-    photo_num = len(album.episode_list)
-    # 总页数
-    page_count = len(cl.get_photo_detail(album_id).page_arr)
+@_matcher.handle()
+async def get_jm_info(bot: Bot, session: Uninfo, album_id: str) -> UniMessage | None:
+    path, text_content = await _build_album_info(bot, session, album_id)
     logger.info(f"本子信息 {album_id}", session=session)
-    # 构建文本消息
-    text_content = (
-        f'本子信息:\n'
-        f'* [{album.id}]\n'
-        f'* {album.authoroname}/{other_name_result.strip()}\n'
-        f'* 作者: {author_str}\n'
-        f'* 登场人物: {actor_str}\n'
-        f'* tags: {tag_str}\n'
-        f'* 章节标题: {photo_title}\n'
-        f'* 页数: {page_count}\n'
-        f'当前为第 {photo_curr} 章, 总章节数: {photo_num}\n'
-        f'本插件及其相关已在GitHub开源, 详见: https://github.com/JUKOMU/zhenxun_bot_plugins_jukomu_dev'
-    )
-
-    # 第一次尝试发送原图
-    try:
-        await MessageUtils.build_message([path, text_content]).send(reply_to=True)
-        logger.info(f"本子 {album_id} 信息及原图发送成功。")
-    except Exception as e:
-        logger.error(f"发送本子 {album_id} 信息失败，尝试发送缩小图片。", e=e)
-
-        # 尝试缩小图片并再次发送
-        await compress_image(path.absolute(), target_size=(200, 266), quality=100)
-        try:
-            await MessageUtils.build_message([path, text_content]).send(reply_to=True)
-            logger.info(f"本子 {album_id} 信息及缩小图片发送成功。")
-        except Exception as e:
-            logger.error(f"发送本子 {album_id} 的缩小图片失败，尝试发送反转图片。", e=e)
-            reversed_path = await reverse_and_save_image(path)
-            if reversed_path:
-                try:
-                    await MessageUtils.build_message([reversed_path, text_content]).send(reply_to=True)
-                    logger.info(f"本子 {album_id} 信息及反转图片发送成功。")
-                except Exception as e_reverse:
-                    logger.error(f"发送本子 {album_id} 的反转图片也失败了。", e=e_reverse)
-                    # 直接发送无图片信息
-                    await MessageUtils.build_message([text_content]).send(reply_to=True)
-            else:
-                logger.error(f"未能创建本子 {album_id} 的反转图片，发送失败。")
-                # 直接发送无图片信息
-                await MessageUtils.build_message([text_content]).send(reply_to=True)
+    await _send_album_info(album_id, path, text_content)
 
 
 async def compress_image_file(image_path, target_kb=1000, quality=95):
@@ -0,0 +1,148 @@
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, ClassVar
+
+from jmcomic import JmAlbumDetail
+
+# 开源声明
+GITHUB_NOTICE = "本插件及其相关已在GitHub开源, 详见: https://github.com/JUKOMU/zhenxun_bot_plugins_jukomu_dev"
+# 最多缓存的格式化结果数, 超出时淘汰最久未使用的
+MAX_FORMATTED_ALBUMS = 256
+
+
+@dataclass(frozen=True)
+class AlbumInfo:
+    """
+    格式化后的本子信息
+    :param album_id: 本子jm号
+    :param title: 作者/其他标题名
+    :param authors: 作者信息
+    :param actors: 登场人物信息
+    :param tags: 标签信息
+    """
+    album_id: str
+    title: str
+    authors: str
+    actors: str
+    tags: str
+
+    def gallery_row(self) -> list[str]:
+        """
+        画廊html中的一行描述
+        """
+        return [self.album_id, self.title, self.authors, self.actors, self.tags]
+
+
+class AlbumFormatter:
+    """
+    本子信息格式化
+    结果按jm号缓存, 本子详情对象变化或详情缓存失效时重新生成
+    """
+    # jm号 -> (本子详情, 格式化结果)
+    _infos: ClassVar[OrderedDict[str, tuple[JmAlbumDetail, AlbumInfo]]] = OrderedDict()
+    # jm号 -> (本子详情, 文本消息)
+    _texts: ClassVar[OrderedDict[str, tuple[JmAlbumDetail, str]]] = OrderedDict()
+
+    @staticmethod
+    def _join(values) -> str:
+        return f"[{', '.join(values)}]"
+
+    @staticmethod
+    def _lookup(cache: OrderedDict, album_id: str, album: JmAlbumDetail):
+        cached = cache.get(album_id)
+        if cached and cached[0] is album:
+            cache.move_to_end(album_id)
+            return cached[1]
+        return None
+
+    @staticmethod
+    def _store(cache: OrderedDict, album_id: str, album: JmAlbumDetail, value):
+        cache[album_id] = (album, value)
+        cache.move_to_end(album_id)
+        while len(cache) > MAX_FORMATTED_ALBUMS:
+            cache.popitem(last=False)
+
+    @classmethod
+    def format(cls, album_id: str, album: JmAlbumDetail) -> AlbumInfo:
+        """
+        获取本子的格式化信息
+        :param album_id: 请求的jm号
+        :param album: 本子详情
+        """
+        cached = cls._lookup(cls._infos, album_id, album)
+        if cached is not None:
+            return cached
+
+        # 构造其他标题名
+        try:
+            other_name = re.sub(r'\[.*?\]', '', album.name.replace(album.oname, ""))
+        except Exception:
+            other_name = ''
+
+        info = AlbumInfo(
+            album_id=album.id,
+            title=f'{album.authoroname}/{other_name.strip()}',
+            authors=cls._join(album.authors),
+            actors=cls._join(album.actors),
+            tags=cls._join(album.tags),
+        )
+        cls._store(cls._infos, album_id, album, info)
+        return info
+
+    @classmethod
+    async def info_text(cls,
+                        album_id: str,
+                        album: JmAlbumDetail,
+                        load_page_count: Callable[[str], Awaitable[int]]) -> str:
+        """
+        获取jm信息的文本消息
+        :param album_id: 请求的jm号, 可能为章节id
+        :param album: 本子详情
+        :param load_page_count: 获取章节页数的方法, 仅在没有缓存时调用
+        """
+        cached = cls._lookup(cls._texts, album_id, album)
+        if cached is not None:
+            return cached
+
+        info = cls.format(album_id, album)
+
+        # 构造章节信息
+        photo_curr = ""
+        photo_title = ""
+        for value in album.episode_list:
+            # 章节编号
+            if value[0] == album_id:
+                # 章节序号
+                photo_curr = value[1]
+                # 章节标题
+                photo_title = value[2]
+                break
+        if photo_curr == "":
+            photo_curr = 1
+        photo_num = len(album.episode_list)
+        # 总页数
+        page_count = await load_page_count(album_id)
+
+        text_content = (
+            f'本子信息:\n'
+            f'* [{info.album_id}]\n'
+            f'* {info.title}\n'
+            f'* 作者: {info.authors}\n'
+            f'* 登场人物: {info.actors}\n'
+            f'* tags: {info.tags}\n'
+            f'* 章节标题: {photo_title}\n'
+            f'* 页数: {page_count}\n'
+            f'当前为第 {photo_curr} 章, 总章节数: {photo_num}\n'
+            f'{GITHUB_NOTICE}'
+        )
+        cls._store(cls._texts, album_id, album, text_content)
+        return text_content
+
+    @classmethod
+    def invalidate(cls, album_id: str):
+        """
+        清除jm号对应的格式化结果
+        """
+        cls._infos.pop(album_id, None)
+        cls._texts.pop(album_id, None)
@@ -1,5 +1,7 @@
 import asyncio
 import os
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
 from typing import ClassVar
@@ -9,7 +11,9 @@ from jmcomic import JmAlbumDetail, JmModuleConfig, MissingAlbumPhotoException
 from nonebot.adapters.onebot.v11 import Bot
 
 from zhenxun.configs.path_config import DATA_PATH
+from .album_formatter import AlbumFormatter
 from .data_for_album import DataForAlbum
+from ..jmcomic_common import IndexedAlbum, local_index
 
 JPG_OUTPUT_PATH = "/resources/image/jmcomic"
 PDF_OUTPUT_PATH = DATA_PATH / "jmcomic" / "jmcomic_pdf"
@@ -23,6 +27,11 @@ op = jmcomic.create_option_by_file(str(OPTION_FILE.absolute()))
 
 cl = op.new_jm_client()
 
+# 本子详情缓存有效期(秒)
+ALBUM_DETAIL_TTL = 30 * 60
+# 最多缓存的本子详情数, 超出时淘汰最久未使用的
+MAX_CACHED_DETAILS = 256
+
 
 @dataclass
 class DetailInfo:
@@ -32,6 +41,63 @@ class DetailInfo:
     album_id: str
 
 
+class AlbumDetailCache:
+    """
+    本子详情缓存
+    以请求的jm号为键, 失效时同时清除对应的格式化结果
+    写入时清除所有过期的详情, 超出数量上限时淘汰最久未使用的
+    """
+    # jm号 -> (缓存时间, 本子详情)
+    _details: ClassVar[OrderedDict[str, tuple[float, JmAlbumDetail]]] = OrderedDict()
+
+    @classmethod
+    def get(cls, album_id: str) -> JmAlbumDetail | None:
+        cached = cls._details.get(album_id)
+        if cached is None:
+            return None
+        cached_at, detail = cached
+        if time.monotonic() - cached_at > ALBUM_DETAIL_TTL:
+            cls.invalidate(album_id)
+            return None
+        cls._details.move_to_end(album_id)
+        return detail
+
+    @classmethod
+    def set(cls, album_id: str, detail: JmAlbumDetail):
+        cached = cls._details.get(album_id)
+        if cached and cached[1] is not detail:
+            AlbumFormatter.invalidate(album_id)
+        now = time.monotonic()
+        cls._details[album_id] = (now, detail)
+        cls._details.move_to_end(album_id)
+        expired = [key for key, (cached_at, _) in cls._details.items() if now - cached_at > ALBUM_DETAIL_TTL]
+        for key in expired:
+            cls.invalidate(key)
+        while len(cls._details) > MAX_CACHED_DETAILS:
+            key, _ = cls._details.popitem(last=False)
+            AlbumFormatter.invalidate(key)
+
+    @classmethod
+    def invalidate(cls, album_id: str):
+        cls._details.pop(album_id, None)
+        AlbumFormatter.invalidate(album_id)
+
+    @classmethod
+    async def fetch(cls, album_id: str) -> JmAlbumDetail:
+        """
+        获取本子详情, 优先使用缓存
+        """
+        detail = cls.get(album_id)
+        if detail is None:
+            detail = await asyncio.to_thread(cl.get_album_detail, album_id)
+            cls.set(album_id, detail)
+            local_index.submit([IndexedAlbum(album_id=str(detail.id),
+                                             title=detail.name,
+                                             tags=tuple(detail.tags),
+                                             authors=tuple(detail.authors))])
+        return detail
+
+
 class JmDownload:
     _data: ClassVar[dict[str, list[DetailInfo]]] = {}
     album_data: DataForAlbum = DataForAlbum()
@@ -69,8 +135,9 @@ class JmDownload:
         """
 
         try:
-            cl.login('xxx', "xxx")
-            detail = cl.get_album_detail(album_id)
+            if AlbumDetailCache.get(album_id) is None:
+                cl.login('xxx', "xxx")
+            detail = await AlbumDetailCache.fetch(album_id)
             album_data.set_album(detail)
         except MissingAlbumPhotoException as e:
             raise e
@@ -93,3 +160,11 @@ class JmDownload:
             await asyncio.to_thread(
                 cl.download_image, url, cover_path, decode_image=False
             )
+
+    @classmethod
+    async def get_page_count(cls, photo_id: str) -> int:
+        """
+        获取章节页数
+        """
+        photo = await asyncio.to_thread(cl.get_photo_detail, photo_id)
+        return len(photo.page_arr)
@@ -3,23 +3,28 @@ from pathlib import Path
 
 import PIL
 import aiofiles
-import redis
 from PIL import ImageOps
 from PIL.Image import Image
+from arclet.alconna import AllParam
 from arclet.alconna.args import Arg
 from jmcomic import *
 from nonebot.adapters.onebot.v11 import Bot, MessageEvent
 from nonebot.plugin import PluginMetadata
 from nonebot.plugin.on import on_message
 from nonebot.rule import to_me
-from nonebot_plugin_alconna import Alconna, Args, Arparma, on_alconna, Match, UniMsg
+from nonebot_plugin_alconna import Alconna, Args, Arparma, on_alconna, Match, Option, UniMessage, UniMsg
 from nonebot_plugin_uninfo import Uninfo
 
 from zhenxun.configs.utils import BaseBlock, PluginCdBlock, PluginExtraData
 from zhenxun.utils.message import MessageUtils
 from .data_source import *
+from .aggregate import aggregate_search, render_aggregate_pages
+from .config import AGGREGATE_MAX_PAGES
+from .query import DEFAULT_EXCLUDES, FilterProfile, FilterProfileStore, SearchQuery, parse_search_terms
+from .result_cache import RenderedPage, get_result_cache, rendered_page_cache
+from ..jmcomic_common import local_index
 from ..jmcomic_downloader import _ as jm_download
-from ..jmcomic_info import get_jm_info
+from ..jmcomic_info import create_image_gallery_html, get_jm_info, upload_gallery_html
 
 __plugin_meta__ = PluginMetadata(
     name="Jm搜索",
@@ -37,6 +42,24 @@ __plugin_meta__ = PluginMetadata(
             jm搜索 全彩+萝莉+无修正+... 2
         带屏蔽项的搜索
             jm搜索 无修正-3D+全彩-CG集+... 1
+
+        jm搜索聚合 [搜索内容] [页数]? ?[排序] ?[网页]
+        一次获取多页搜索结果并合并去重, 排序: 按标签匹配程度排序, 网页: 发送html画廊
+    示例：
+        jm搜索聚合 全彩+萝莉 3
+        jm搜索聚合 全彩+萝莉 5 排序 网页
+
+        jm搜索过滤 [过滤项]?
+        设置本群(私聊为个人)每次搜索都附加的包含项和屏蔽项
+    示例：
+        jm搜索过滤: 查看当前过滤
+        jm搜索过滤 -3D-CG集+全彩: 之后的搜索都屏蔽3D和CG集并包含全彩
+        jm搜索过滤 清除: 清除过滤
+
+        jm本地搜索 [关键词,多个关键词用+或空格连接]
+        在本地索引中按标题、标签、作者搜索查看过、搜索过、收藏过的本子, 不请求网站
+    示例：
+        jm本地搜索 全彩+萝莉
     """.strip(),
     extra=PluginExtraData(
         author="JUKOMU",
@@ -54,65 +77,21 @@ _matcher = on_alconna(
     rule=to_me()
 )
 
-_index_matcher = on_message(rule=to_me(), priority=10)
-
-
-def parse_search_terms(search_str: str):
-    """
-    解析搜索字符串，返回包含项列表和排除项列表
-
-    参数:
-        search_str: 格式为"term1[+/-]term2[+/-]term3[+/-]term4[+/-]..."的字符串
-
-    返回:
-        包含元组: (包含列表, 排除列表)
-    """
-    include_terms = []
-    exclude_terms = []
-
-    if not search_str:
-        return include_terms, exclude_terms
-
-    """
-    先按减号分割字符串
-    分隔结果为两种
-    1. 单字符串, 该字符串原来被夹在两个“-”间
-    2. 含“+”号字符串
-    一定不会有含“-”的字符串
-    对于第二种字符串, 可以确定再次分隔后的第一个字符串为“-”后的字符串
-    """
-
-    first_str = ""
-    rest_str = ""
-    flag = True
-    for c in search_str:
-        if c == '+' or c == '-':
-            flag = False
-        if flag:
-            first_str += c
-        else:
-            rest_str += c
-
-    include_terms.append(first_str)
+_aggregate_matcher = on_alconna(
+    Alconna("jm搜索聚合", Args[Arg("search_str", str), Arg("pages?", int)], Option("排序"), Option("网页"),
+            separators=' '),
+    priority=5, block=True, rule=to_me()
+)
 
-    parts = rest_str.split('-')
+_filter_matcher = on_alconna(
+    Alconna("jm搜索过滤", Args[Arg("filter_str?", str)], separators=' '), priority=5, block=True, rule=to_me()
+)
 
-    for part in parts:
-        index = part.find("+")
-        if index == -1:
-            # 这是排除字符串
-            if len(part) > 0:
-                exclude_terms.append(part)
-        else:
-            # 再次分隔字符串
-            part_subs = part.split("+")
-            if len(part_subs[0]) > 0:
-                exclude_terms.append(part_subs[0])
-            # 剩余为包含字符串
-            for sub in part_subs[1:]:
-                include_terms.append(sub)
+_local_matcher = on_alconna(
+    Alconna("jm本地搜索", Args["keywords", AllParam], separators=' '), priority=5, block=True, rule=to_me()
+)
 
-    return include_terms, exclude_terms
+_index_matcher = on_message(rule=to_me(), priority=10)
 
 
 async def compress_image(
@@ -122,60 +101,11 @@ async def compress_image(
         quality: int = 95
 ) -> Image.Image | None:
     """
-    异步压缩一个 PIL.Image.Image 对象到指定的目标大小(KB)和像素尺寸。
+    异步压缩一个 PIL.Image.Image 对象，参数同 encode_jpeg。
 
-    该函数会首先调整图片尺寸（如果提供了 target_size），然后再通过
-    迭代地降低JPEG的保存质量来实现压缩。
-
-    :param image: 需要被压缩的 PIL.Image.Image 对象。
-    :param target_size: (可选) 目标像素尺寸，格式为 (width, height)。
-                        如果为 None，则不改变图片尺寸。
-    :param target_kb: 目标文件大小（单位：KB）。
-    :param quality: 初始的压缩质量（1-95）。
     :return: 一个新的、被压缩和调整尺寸后的 PIL.Image.Image 对象，或 None。
     """
-
-    def _compress_sync():
-        """同步的压缩核心逻辑，用于在线程中执行。"""
-        resized_image = image
-        if target_size:
-            try:
-                # 使用 LANCZOS 滤镜进行高质量的缩放
-                resized_image = image.resize(target_size, Image.Resampling.LANCZOS)
-            except Exception as e:
-                logger.error(f"调整图片尺寸时发生错误: {e}")
-                return None
-
-        # 在调整尺寸后的图片上进行压缩
-        output_image = resized_image
-        if output_image.mode in ('RGBA', 'P'):
-            output_image = Image.new("RGB", output_image.size, (255, 255, 255))
-            alpha_channel = resized_image.getchannel('A') if resized_image.mode == 'RGBA' else resized_image
-            output_image.paste(resized_image, (0, 0), alpha_channel)
-
-        final_bytes = None
-        min_quality = 10
-        current_quality = quality
-
-        while current_quality >= min_quality:
-            try:
-                buffer = BytesIO()
-                output_image.save(buffer, format="JPEG", quality=current_quality, optimize=True)
-
-                size_kb = buffer.tell() / 1024
-                final_bytes = buffer.getvalue()
-
-                if size_kb <= target_kb:
-                    return final_bytes
-
-                current_quality -= 5
-            except Exception as e:
-                logger.error(f"压缩图片时发生错误: {e}")
-                return None
-
-        return final_bytes
-
-    compressed_bytes = await asyncio.to_thread(_compress_sync)
+    compressed_bytes = await compress_image_bytes(image, target_size, target_kb, quality)
 
     if compressed_bytes:
         return Image.open(BytesIO(compressed_bytes))
@@ -233,6 +163,46 @@ async def compress_image_file(image_path, target_kb=500, quality=95):
         logger.info("无法将图片压缩到目标大小。")
 
 
+async def _send_search_result(session: Uninfo, arparma: Arparma, image_bytes: bytes, album_ids: list[str]):
+    """
+    发送搜索结果图片并缓存对应的jm号列表
+    """
+    uid = session.user.id
+    path = Path() / f"{BASE_PATH}/{uid}.jpg"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    async with aiofiles.open(path.absolute(), 'wb') as f:
+        await f.write(image_bytes)
+
+    # 发送图片
+    msg_id = None
+    try:
+        msg = await (MessageUtils.build_message([path, f"\n[回复'序号'查看和下载对应本子,回复'列表'获取搜索结果jm列表]"])
+                     .send(reply_to=True))
+        msg_id = msg.msg_ids[0].get('message_id')
+    except Exception as e:
+        logger.error("发送jm搜索结果失败, 尝试发送反转图片", session=session, e=e)
+
+        # 如果原图发送失败，则尝试发送反转后的图片
+        try:
+            # 调用函数来反转并保存图片
+            reverse_img_path = await reverse_and_save_image(PIL.Image.open(BytesIO(image_bytes)), path)
+
+            # 发送反转后的图片
+            msg = await (MessageUtils.build_message([reverse_img_path, f"\n[回复'序号'查看和下载对应本子,回复'列表'获取搜索结果jm列表]"])
+                         .send(reply_to=True))
+            msg_id = msg.msg_ids[0].get('message_id')
+            logger.info("JM搜索结果反转图片发送成功。")
+        except Exception as e_reverse:
+            logger.error("发送反转后的图片也失败了", session=session, e=e_reverse)
+
+    # 缓存搜索结果
+    try:
+        if msg_id is not None:
+            await get_result_cache().set(msg_id, album_ids)
+    except Exception as e:
+        logger.error(f"jm搜索缓存失败", arparma.header_result, session=session, e=e)
+
+
 @_matcher.handle()
 async def _(bot: Bot,
             session: Uninfo,
@@ -248,9 +218,33 @@ async def _(bot: Bot,
         page_result = page.result
 
     # 字符串解析
-    search_params, filter_params = parse_search_terms(search_str)
-    page = await JmSearchPageManager(search_params=search_params, filter_params=filter_params,
-                                     page=page_result).async_init()
+    group_id = session.group.id if session.group else None
+    profile = FilterProfileStore.get(FilterProfileStore.owner_key(group_id, session.user.id))
+    query = SearchQuery.parse(search_str, profile)
+    layout_preset = get_group_preset(group_id)
+    page = JmSearchPageManager(query=query, page=page_result, layout_preset=layout_preset)
+
+    # 已渲染过(或正在预取)的搜索结果直接发送, 不同布局预设的渲染结果分开缓存
+    search_key = f"{layout_preset}:{query.cache_key}"
+    session_key = f"{group_id or ''}:{session.user.id}"
+    JmSearchPageManager.switch_session_search(session_key, search_key)
+    await JmSearchPageManager.wait_prefetch(search_key, page_result)
+    rendered = rendered_page_cache.get(search_key, page_result)
+    if rendered is not None:
+        await _send_search_result(session, arparma, rendered.image, rendered.album_ids)
+        JmSearchPageManager.schedule_prefetch(query, search_key, rendered.page + 1, rendered.max_page, layout_preset)
+        logger.info(f"jm搜索 {search_str} (缓存)", arparma.header_result, session=session)
+        return
+
+    # 同一会话的新搜索会取消正在进行的旧搜索
+    try:
+        page = await JmSearchPageManager.run_for_session(session_key, page.async_init())
+    except SearchSuperseded:
+        return
+    except asyncio.TimeoutError:
+        await (MessageUtils.build_message([f"搜索超时, 请稍后再试"])
+               .send(reply_to=True))
+        return
 
     if len(page.search_page_detail.get_albums()) == 0:
         # 没有搜索结果
@@ -267,50 +261,104 @@ async def _(bot: Bot,
             # 无法直接发送封面则发送搜索结果图片
             pass
 
-    img = await page.create_page_img()
-    if img is None:
+    try:
+        image_bytes = await JmSearchPageManager.run_for_session(session_key, page.create_page_img())
+    except SearchSuperseded:
+        return
+    if image_bytes is None:
         await (MessageUtils.build_message([f"搜索结果生成失败"])
                .send(reply_to=True))
         return
+    album_ids = [album.get_album_id() for album in page.search_page_detail.get_albums()]
+    rendered = RenderedPage(album_ids=album_ids, image=image_bytes, page=page.page, max_page=page.max_page)
+    rendered_page_cache.set(search_key, page.page, rendered, alias=page_result)
 
-    uid = session.user.id
-    compress_img = await compress_image(img, target_size=(1360, 2001), target_kb=4096, quality=95)
-    compress_img.save((Path() / f"{BASE_PATH}/{uid}.jpg").absolute())
-
-    # 发送图片
-    try:
-        msg = await (MessageUtils.build_message([Path() / f"{BASE_PATH}/{uid}.jpg", f"\n[回复'序号'查看和下载对应本子,回复'列表'获取搜索结果jm列表]"])
-                     .send(reply_to=True))
-        msg_id = msg.msg_ids[0].get('message_id')
-    except Exception as e:
-        logger.error("发送jm搜索结果失败, 尝试发送反转图片", session=session, e=e)
+    await _send_search_result(session, arparma, image_bytes, album_ids)
+    page.prefetch_next_page(search_key)
+    logger.info(f"jm搜索 {search_str}", arparma.header_result, session=session)
 
-        # 如果原图发送失败，则尝试发送反转后的图片
-        try:
-            # 调用函数来反转并保存图片
-            reverse_img_path = await reverse_and_save_image(compress_img, Path() / f"{BASE_PATH}/{uid}.jpg")
 
-            # 发送反转后的图片
-            msg = await (MessageUtils.build_message([reverse_img_path, f"\n[回复'序号'查看和下载对应本子,回复'列表'获取搜索结果jm列表]"])
-                         .send(reply_to=True))
-            msg_id = msg.msg_ids[0].get('message_id')
-            logger.info("JM搜索结果反转图片发送成功。")
-        except Exception as e_reverse:
-            logger.error("发送反转后的图片也失败了", session=session, e=e_reverse)
+@_aggregate_matcher.handle()
+async def _(bot: Bot,
+            session: Uninfo,
+            arparma: Arparma,
+            search_str: str,
+            pages: Match[int]):
+    group_id = session.group.id if session.group else None
+    profile = FilterProfileStore.get(FilterProfileStore.owner_key(group_id, session.user.id))
+    query = SearchQuery.parse(search_str, profile)
+    session_key = f"{group_id or ''}:{session.user.id}"
+    page_count = pages.result if pages.available else AGGREGATE_MAX_PAGES
 
-    # 缓存搜索结果
     try:
-        cache = []
-        for album in page.search_page_detail.get_albums():
-            album_id = album.get_album_id()
-            cache.append(album_id)
-        connect = redis.Redis(host='localhost', port=6379, decode_responses=True, password='xxx')
-        connect.rpush(msg_id, *cache)
-        connect.expire(msg_id, 24 * 60 * 60)
-    except Exception as e:
-        print(e)
-        logger.info(f"jm搜索缓存失败", arparma.header_result, session=session)
-    logger.info(f"jm搜索 {search_str}", arparma.header_result, session=session)
+        albums, page_count = await JmSearchPageManager.run_for_session(
+            session_key, aggregate_search(query, page_count, sort_by_score=arparma.find("排序")))
+    except SearchSuperseded:
+        return
+    except asyncio.TimeoutError:
+        await (MessageUtils.build_message([f"搜索超时, 请稍后再试"])
+               .send(reply_to=True))
+        return
+    if not albums:
+        await (MessageUtils.build_message([f"没有搜索结果"])
+               .send(reply_to=True))
+        return
+
+    if arparma.find("网页"):
+        current_timestamp = create_image_gallery_html(
+            image_paths=[f'https://{JmModuleConfig.DOMAIN_IMAGE_LIST[0]}/media/albums/{album.get_album_id()}_3x4.jpg'
+                         for album in albums],
+            descriptions_data=[[album.get_album_id(), album.get_title(), "-", "-", f"[{', '.join(album.get_tags())}]"]
+                               for album in albums],
+        )
+        await upload_gallery_html(bot, session, current_timestamp)
+    else:
+        try:
+            rendered = await JmSearchPageManager.run_for_session(
+                session_key, render_aggregate_pages(albums, get_group_preset(group_id)))
+        except SearchSuperseded:
+            return
+        if not rendered:
+            await (MessageUtils.build_message([f"搜索结果生成失败"])
+                   .send(reply_to=True))
+            return
+        for album_ids, image_bytes in rendered:
+            await _send_search_result(session, arparma, image_bytes, album_ids)
+    logger.info(f"jm搜索聚合 {query} {page_count}页 共{len(albums)}个", arparma.header_result, session=session)
+
+
+@_filter_matcher.handle()
+async def _(session: Uninfo, arparma: Arparma, filter_str: Match[str]):
+    key = FilterProfileStore.owner_key(session.group.id if session.group else None, session.user.id)
+    if not filter_str.available:
+        profile = FilterProfileStore.get(key)
+        return await MessageUtils.build_message([f"当前搜索过滤: {profile or '无'}"]).send(reply_to=True)
+    if filter_str.result == "清除":
+        await FilterProfileStore.set(key, None)
+        logger.info("清除jm搜索过滤", arparma.header_result, session=session)
+        return await MessageUtils.build_message(["已清除搜索过滤"]).send(reply_to=True)
+    include, exclude = parse_search_terms(filter_str.result)
+    query = SearchQuery.build(include, exclude)
+    # 默认屏蔽项总会附加, 不需要保存
+    default_excludes = {term.casefold() for term in DEFAULT_EXCLUDES}
+    profile = FilterProfile(include=query.include,
+                            exclude=tuple(term for term in query.exclude if term.casefold() not in default_excludes))
+    await FilterProfileStore.set(key, profile)
+    logger.info(f"设置jm搜索过滤 {profile}", arparma.header_result, session=session)
+    await MessageUtils.build_message([f"已设置搜索过滤: {profile}"]).send(reply_to=True)
+
+
+@_local_matcher.handle()
+async def _(session: Uninfo, arparma: Arparma, keywords: UniMessage):
+    keywords = keywords.extract_plain_text().strip()
+    terms = keywords.replace("+", " ").split()
+    albums, total = await local_index.search(terms)
+    if not albums:
+        return await MessageUtils.build_message([f"本地索引中没有匹配的本子"]).send(reply_to=True)
+    lines = [f"JM{album.album_id} {album.title}" for album in albums]
+    lines.append(f"共{total}个结果" + (f", 仅显示最近的{len(albums)}个" if total > len(albums) else ""))
+    await MessageUtils.build_message(["\n".join(lines)]).send(reply_to=True)
+    logger.info(f"jm本地搜索 {keywords} 共{total}个", arparma.header_result, session=session)
 
 
 @_index_matcher.handle()
@@ -332,11 +380,14 @@ async def __(bot: Bot, session: Uninfo, event: MessageEvent, message: UniMsg):
     match = re.search(r'jm搜索', text_content)
     if not match:
         return
-    connect = redis.Redis(host='localhost', port=6379, decode_responses=True, password='xxx')
-    if not connect.exists(message_id):
+    try:
+        list = await get_result_cache().get(message_id)
+    except Exception as e:
+        logger.error("读取jm搜索缓存失败", session=session, e=e)
+        list = None
+    if not list:
         return await (MessageUtils.build_message([f"缓存过期, 请重新搜索"])
                       .send(reply_to=True))
-    list = connect.lrange(message_id, 0, -1)
     if str(index) == "列表":
         msg = ""
         for i, a_id in enumerate(list, start=1):
@@ -0,0 +1,80 @@
+import asyncio
+
+from zhenxun.services.log import logger
+
+from .config import AGGREGATE_MAX_PAGES, AGGREGATE_CONCURRENCY
+from .data_source import AlbumDetail, JmSearchPageManager, SearchPageDetail
+from .layout import MAX_ALBUM_NUMBER
+from .query import SearchQuery
+
+
+def tag_score(album: AlbumDetail, query: SearchQuery) -> int:
+    """
+    本子与搜索包含项的匹配程度: 命中标签的包含项记2分, 只命中标题的记1分
+    """
+    tags = [tag.casefold() for tag in album.get_tags()]
+    title = album.get_title().casefold()
+    score = 0
+    for term in query.include:
+        term = term.casefold()
+        if any(term in tag for tag in tags):
+            score += 2
+        elif term in title:
+            score += 1
+    return score
+
+
+async def aggregate_search(query: SearchQuery,
+                           pages: int,
+                           sort_by_score: bool = False) -> tuple[list[AlbumDetail], int]:
+    """
+    并发获取多页搜索结果, 合并去重
+    先获取第一页得到最大页码, 再并发获取其余页, 所有请求共用同一个客户端
+    :param query: 搜索条件
+    :param pages: 获取的页数, 不超过配置的上限和实际最大页码
+    :param sort_by_score: 是否按标签匹配程度排序(稳定排序, 同分保持搜索顺序)
+    :return: (本子列表, 实际获取的页数)
+    """
+    first = await JmSearchPageManager(query=query, page=1).async_init()
+    pages = max(1, min(pages, AGGREGATE_MAX_PAGES, first.max_page))
+
+    semaphore = asyncio.Semaphore(AGGREGATE_CONCURRENCY)
+
+    async def fetch(page: int) -> JmSearchPageManager | None:
+        async with semaphore:
+            try:
+                return await JmSearchPageManager(query=query, page=page).async_init()
+            except Exception as e:
+                logger.warning(f"jm搜索聚合 {query} 第{page}页获取失败", e=e)
+                return None
+
+    managers = [first, *await asyncio.gather(*(fetch(page) for page in range(2, pages + 1)))]
+
+    albums: dict[str, AlbumDetail] = {}
+    for manager in managers:
+        if manager is None:
+            continue
+        for album in manager.search_page_detail.get_albums():
+            albums.setdefault(album.get_album_id(), album)
+    result = list(albums.values())
+    if sort_by_score:
+        result.sort(key=lambda album: tag_score(album, query), reverse=True)
+    return result, pages
+
+
+async def render_aggregate_pages(albums: list[AlbumDetail], layout_preset: str) -> list[tuple[list[str], bytes]]:
+    """
+    将合并后的本子按每张图片最多MAX_ALBUM_NUMBER个渲染
+    :return: 每张图片的(jm号列表, 图片)
+    """
+    chunks = [albums[i:i + MAX_ALBUM_NUMBER] for i in range(0, len(albums), MAX_ALBUM_NUMBER)]
+    managers = []
+    for index, chunk in enumerate(chunks, start=1):
+        manager = JmSearchPageManager(query=SearchQuery(include=()), page=index, layout_preset=layout_preset)
+        manager.max_page = len(chunks)
+        manager.search_page_detail = SearchPageDetail()
+        manager.search_page_detail.albums = chunk
+        managers.append(manager)
+    images = await asyncio.gather(*(manager.create_page_img() for manager in managers))
+    return [([album.get_album_id() for album in chunk], image)
+            for chunk, image in zip(chunks, images) if image is not None]
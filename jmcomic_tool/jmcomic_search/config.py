@@ -0,0 +1,90 @@
+import configparser
+import os
+
+from zhenxun.services.log import logger
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+config_path = os.path.join(script_dir, 'config.ini')
+config = configparser.ConfigParser()
+# --- 配置 ---
+# 搜索结果缓存后端 memory / redis
+RESULT_CACHE_BACKEND = "memory"
+# 搜索结果缓存有效期(秒)
+RESULT_CACHE_TTL = 24 * 60 * 60
+# 进程内缓存最大条目数
+RESULT_CACHE_MAX_ENTRIES = 2048
+REDIS_HOST = "localhost"
+REDIS_PORT = 6379
+REDIS_PASSWORD: str | None = None
+REDIS_DB = 0
+REDIS_MAX_CONNECTIONS = 16
+# 搜索结果图片缓存有效期(秒)
+RENDER_CACHE_TTL = 30 * 60
+# 搜索结果图片缓存大小上限(字节)
+RENDER_CACHE_MAX_BYTES = 128 * 1024 * 1024
+# 发送搜索结果后是否在后台预取下一页
+PREFETCH_ENABLED = True
+# 同时进行的预取任务上限
+PREFETCH_MAX_CONCURRENCY = 2
+# 是否渐进渲染搜索结果(封面到达后依次贴入, 满足预算后不再等待剩余封面)
+PROGRESSIVE_ENABLED = True
+# 封面完整度达到该比例且耗时超过延迟预算时即可发送
+PROGRESSIVE_MIN_COMPLETENESS = 0.9
+# 延迟预算(秒)
+PROGRESSIVE_LATENCY_BUDGET = 3.0
+# 封面截止时间(秒), 超过后未到达的封面使用占位图
+PROGRESSIVE_COVER_DEADLINE = 10.0
+# 渲染模式 rgb / rgba
+RENDER_MODE = "rgb"
+# 搜索请求超时(秒)
+SEARCH_TIMEOUT = 20.0
+# 聚合搜索最多获取的页数
+AGGREGATE_MAX_PAGES = 5
+# 聚合搜索同时请求的页数
+AGGREGATE_CONCURRENCY = 3
+# 默认布局预设
+LAYOUT_DEFAULT_PRESET = "default"
+# 群号 -> 布局预设
+LAYOUT_GROUP_PRESETS: dict[str, str] = {}
+
+
+def reload_config():
+    global RESULT_CACHE_BACKEND, RESULT_CACHE_TTL, RESULT_CACHE_MAX_ENTRIES, REDIS_HOST, REDIS_PORT, REDIS_PASSWORD, REDIS_DB, REDIS_MAX_CONNECTIONS, RENDER_CACHE_TTL, RENDER_CACHE_MAX_BYTES, PREFETCH_ENABLED, PREFETCH_MAX_CONCURRENCY, PROGRESSIVE_ENABLED, PROGRESSIVE_MIN_COMPLETENESS, PROGRESSIVE_LATENCY_BUDGET, PROGRESSIVE_COVER_DEADLINE, RENDER_MODE, LAYOUT_DEFAULT_PRESET, LAYOUT_GROUP_PRESETS, SEARCH_TIMEOUT, AGGREGATE_MAX_PAGES, AGGREGATE_CONCURRENCY
+    # 读取配置
+    try:
+        config.read(config_path, encoding='utf-8')
+        RESULT_CACHE_BACKEND = config['ResultCache']['backend'].strip().lower()
+        RESULT_CACHE_TTL = config.getint('ResultCache', 'ttl')
+        RESULT_CACHE_MAX_ENTRIES = config.getint('ResultCache', 'max_entries')
+        REDIS_HOST = config['Redis']['host']
+        REDIS_PORT = config.getint('Redis', 'port')
+        REDIS_PASSWORD = config['Redis']['password'] or None
+        REDIS_DB = config.getint('Redis', 'db')
+        REDIS_MAX_CONNECTIONS = config.getint('Redis', 'max_connections')
+        RENDER_CACHE_TTL = config.getint('RenderCache', 'ttl')
+        RENDER_CACHE_MAX_BYTES = config.getint('RenderCache', 'max_mb') * 1024 * 1024
+        PREFETCH_ENABLED = config.getboolean('Prefetch', 'enabled')
+        PREFETCH_MAX_CONCURRENCY = config.getint('Prefetch', 'max_concurrency')
+        PROGRESSIVE_ENABLED = config.getboolean('Progressive', 'enabled')
+        PROGRESSIVE_MIN_COMPLETENESS = config.getfloat('Progressive', 'min_completeness')
+        PROGRESSIVE_LATENCY_BUDGET = config.getfloat('Progressive', 'latency_budget')
+        PROGRESSIVE_COVER_DEADLINE = config.getfloat('Progressive', 'cover_deadline')
+        RENDER_MODE = config['Render']['mode'].strip().lower()
+        SEARCH_TIMEOUT = config.getfloat('Search', 'timeout')
+        AGGREGATE_MAX_PAGES = config.getint('Aggregate', 'max_pages')
+        AGGREGATE_CONCURRENCY = config.getint('Aggregate', 'concurrency')
+        LAYOUT_DEFAULT_PRESET = config['Layout']['default'].strip()
+        LAYOUT_GROUP_PRESETS = {}
+        for item in config['Layout']['groups'].split(','):
+            if ':' in item:
+                group_id, preset = item.split(':', 1)
+                LAYOUT_GROUP_PRESETS[group_id.strip()] = preset.strip()
+    except FileNotFoundError:
+        logger.error("错误: 配置文件 'config.ini' 未找到！")
+    except (KeyError, configparser.Error) as e:
+        logger.error(f"错误: 配置文件中缺少了必要的键: {e}")
+    except ValueError as e:
+        logger.error(f"错误: 配置文件中的值无效: {e}")
+
+
+reload_config()
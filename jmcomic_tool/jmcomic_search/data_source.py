@@ -1,21 +1,29 @@
 import asyncio
-import math
 import os
-from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
 from io import BytesIO
-from typing import Any
+from typing import Any, ClassVar, Coroutine, TypeVar
 
 import requests
 from PIL import Image, ImageDraw, ImageFont
-from jmcomic import JmOption, JmSearchPage
+from jmcomic import JmHtmlClient, JmOption, JmSearchPage
 from requests import Response
 from zhenxun.services.log import logger
 
-# 每页搜索最大本子数量
-MAX_ALBUM_NUMBER = 80
+from .config import (PREFETCH_ENABLED, PREFETCH_MAX_CONCURRENCY, PROGRESSIVE_ENABLED, PROGRESSIVE_MIN_COMPLETENESS,
+                     PROGRESSIVE_LATENCY_BUDGET, PROGRESSIVE_COVER_DEADLINE, RENDER_MODE, LAYOUT_DEFAULT_PRESET,
+                     LAYOUT_GROUP_PRESETS, SEARCH_TIMEOUT)
+from .result_cache import RenderedPage, prefetch_stats, rendered_page_cache
+from .layout import MAX_ALBUM_NUMBER, PRESETS, get_layout
+from .query import SearchQuery
+from .renderer import SearchPageSpec, render_search_page
+from ..jmcomic_common import IndexedAlbum, cover_fetcher, encode_jpeg, local_index, render_pool
+
 # 基础路径
 BASE_PATH = "resources/image/jm_search"
 
+T = TypeVar("T")
+
 
 def handle_request(url: str, method: str, **args: Any) -> Response:
     try:
@@ -44,6 +52,34 @@ def get_image_info(image_data: bytes) -> dict:
         return {}
 
 
+async def compress_image_bytes(
+        image: Image.Image,
+        target_size: tuple[int, int] | None = None,
+        target_kb: int = 500,
+        quality: int = 95
+) -> bytes | None:
+    """
+    异步压缩图片, 参数同 encode_jpeg, 在线程中执行
+    """
+    return await asyncio.to_thread(encode_jpeg, image, target_size, target_kb, quality)
+
+
+class SearchSuperseded(Exception):
+    """
+    搜索被同一会话的新搜索取代
+    """
+
+
+def get_group_preset(group_id: str | None) -> str:
+    """
+    获取群使用的布局预设
+    """
+    preset = LAYOUT_GROUP_PRESETS.get(str(group_id), LAYOUT_DEFAULT_PRESET) if group_id else LAYOUT_DEFAULT_PRESET
+    if preset not in PRESETS:
+        logger.warning(f"未知的jm搜索布局预设: {preset}")
+    return preset
+
+
 class AlbumDetail:
     """
     本子详细信息
@@ -85,16 +121,11 @@ class AlbumDetail:
     def set_cover(self, cover_bytes: bytes | Any):
         self.cover = cover_bytes
 
-    def load_cover(self):
-        option = JmOption.default()
-        client = option.new_jm_client(impl="html")
-        url = f'/media/albums/{self.album_id}_3x4.jpg'
-        resp = client.get_jm_html(f'{url}')
-        # 添加状态码和内容长度检查
-        if resp is None:
-            logger.error(f"请求失败: URL={url}")
-            self.cover = b""
-        self.cover = resp.content
+    async def load_cover(self):
+        """
+        通过共享连接池加载封面
+        """
+        self.cover = await cover_fetcher.fetch(self.album_id)
 
 
 class SearchPageDetail:
@@ -123,41 +154,39 @@ class SearchPageDetail:
         return self.albums
 
     async def load_albums(self):
-        # 创建线程池，最大20个线程
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            # 收集所有任务
-            tasks = []
-            loop = asyncio.get_event_loop()
-
-            for album in self.albums:
-                # 将同步的 load_cover() 方法放到线程池中执行
-                task = loop.run_in_executor(
-                    executor,
-                    album.load_cover  # 注意这里不加括号，不是调用而是传递方法
-                )
-                tasks.append(task)
-
-            # 等待所有任务完成
-            await asyncio.gather(*tasks)
+        # 所有封面共用同一个连接池并发加载
+        await asyncio.gather(*(album.load_cover() for album in self.albums))
 
 
 class JmSearchPageManager:
     """
     搜索页管理
     """
+    # (搜索缓存键, 页码) -> 预取任务
+    _prefetch_tasks: ClassVar[dict[tuple[str, int], asyncio.Task]] = {}
+    # 会话 -> 该会话最近一次搜索的缓存键
+    _session_searches: ClassVar[dict[str, str]] = {}
+    # 所有搜索共用的客户端
+    _client: ClassVar[JmHtmlClient | None] = None
+    _client_lock: ClassVar[asyncio.Lock] = asyncio.Lock()
+    # 会话 -> 正在进行的搜索
+    _session_tasks: ClassVar[dict[str, asyncio.Task]] = {}
+    # 被同一会话的新搜索取消的任务
+    _superseded_tasks: ClassVar[set[asyncio.Task]] = set()
 
     def __init__(self,
-                 search_params: list[str],
-                 filter_params: list[str],
-                 page: int):
+                 query: SearchQuery,
+                 page: int,
+                 layout_preset: str = LAYOUT_DEFAULT_PRESET):
         """
         JmSearchPageManager 初始化
-        :param search_params: 搜索参数
+        :param query: 搜索条件
         :param page: 页码
+        :param layout_preset: 搜索结果图片布局预设
         """
-        self.search_params: list[str] = search_params
-        self.filter_params: list[str] = filter_params
+        self.query: SearchQuery = query
         self.page: int = page
+        self.layout_preset: str = layout_preset
         # 当前搜索页结果数量
         self.album_number: int = 0
         # 最大页码
@@ -169,18 +198,19 @@ class JmSearchPageManager:
 
     def __repr__(self) -> str:
         attrs = [
-            f"search_params={self.search_params!r}",
+            f"query={self.query!r}",
             f"album_number={self.album_number}",
             f"page={self.page}",
             f"max_page={self.max_page}",
-            f"client={self.client!r}",
+            f"client={self._client!r}",
             f"search_page_detail={self.search_page_detail.__repr__()!r}",
         ]
         return f"JmSearchPageManager({', '.join(attrs)})"
 
-    async def async_init(self):
+    @staticmethod
+    def _create_client() -> JmHtmlClient:
         """
-        初始化
+        创建客户端并登录, 会阻塞, 需在线程中调用
         """
         option = JmOption.default()
         client = option.new_jm_client(impl="html")
@@ -195,10 +225,55 @@ class JmSearchPageManager:
                 client.login(user, pwd)
             except Exception:
                 pass
+        return client
+
+    @classmethod
+    async def get_client(cls) -> JmHtmlClient:
+        """
+        获取所有搜索共用的客户端, 首次调用时在线程中创建并登录
+        """
+        if cls._client is None:
+            async with cls._client_lock:
+                if cls._client is None:
+                    cls._client = await asyncio.wait_for(asyncio.to_thread(cls._create_client), SEARCH_TIMEOUT)
+        return cls._client
+
+    @classmethod
+    async def run_for_session(cls, session_key: str, coro: Coroutine[Any, Any, T]) -> T:
+        """
+        以会话为单位执行搜索步骤, 同一会话有新的搜索时取消旧的搜索
+        :raise SearchSuperseded: 被同一会话的新搜索取消
+        """
+        previous = cls._session_tasks.get(session_key)
+        if previous is not None and not previous.done():
+            cls._superseded_tasks.add(previous)
+            previous.cancel()
+        task = asyncio.create_task(coro)
+        cls._session_tasks[session_key] = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            # 只有被新搜索取消时才转换为SearchSuperseded, 外层任务被取消时继续向上传递
+            # Task.cancelling在python3.11加入, 3.10只根据是否被新搜索取消判断
+            cancelling = getattr(asyncio.current_task(), "cancelling", None)
+            if task in cls._superseded_tasks and not (cancelling and cancelling()):
+                raise SearchSuperseded(session_key)
+            raise
+        finally:
+            cls._superseded_tasks.discard(task)
+            if cls._session_tasks.get(session_key) is task:
+                del cls._session_tasks[session_key]
+
+    async def async_init(self):
+        """
+        初始化
+        """
+        client = await self.get_client()
         # 构造搜索字符串
         search_str = self.get_search_str()
-        # 进行查询
-        self.jm_search_page = client.search_site(search_query=search_str, page=self.page)
+        # 进行查询, 请求在线程中进行, 不阻塞其他群的搜索
+        self.jm_search_page = await asyncio.wait_for(
+            asyncio.to_thread(client.search_site, search_query=search_str, page=self.page), SEARCH_TIMEOUT)
         # 获取最大页数
         self.max_page = self.jm_search_page.page_count
         # 检查page参数
@@ -213,22 +288,107 @@ class JmSearchPageManager:
         """
         构造搜索字符串
         """
-        search_str = ""
-        for _str in self.search_params:
-            search_str = search_str + "+" + _str + " "
-        for _str in self.filter_params:
-            if _str != "AI绘图":
-                search_str = search_str + "-" + _str + " "
-        search_str = search_str + "-" + "AI绘图"
-        return search_str.strip()
+        return self.query.site_query
 
     async def load_search_page_detail(self):
         """
         加载搜索详情
         """
         self.search_page_detail = SearchPageDetail()
+        indexed = []
         for aid, title, tags in self.jm_search_page.iter_id_title_tag():
             self.search_page_detail.add_album(album_id=aid, title=title, tags=tags)
+            indexed.append(IndexedAlbum(album_id=str(aid), title=title, tags=tuple(tags)))
+        # 搜索结果顺带写入本地索引
+        local_index.submit(indexed)
+
+    def prefetch_next_page(self, search_key: str) -> asyncio.Task | None:
+        """
+        在后台预取并渲染下一页
+        :param search_key: 搜索缓存键
+        """
+        return self.schedule_prefetch(self.query, search_key, self.page + 1, self.max_page, self.layout_preset)
+
+    @classmethod
+    def schedule_prefetch(cls,
+                          query: SearchQuery,
+                          search_key: str,
+                          page: int,
+                          max_page: int,
+                          layout_preset: str = LAYOUT_DEFAULT_PRESET) -> asyncio.Task | None:
+        """
+        创建预取任务, 页码无效、已缓存、正在预取或预取任务已达上限时不预取
+        """
+        if not PREFETCH_ENABLED or page > max_page:
+            return None
+        key = (search_key, page)
+        if key in cls._prefetch_tasks or rendered_page_cache.contains(search_key, page):
+            return None
+        if len(cls._prefetch_tasks) >= PREFETCH_MAX_CONCURRENCY:
+            return None
+        task = asyncio.create_task(cls._prefetch(query, search_key, page, layout_preset))
+        cls._prefetch_tasks[key] = task
+        task.add_done_callback(lambda _: cls._prefetch_tasks.pop(key, None))
+        prefetch_stats.started += 1
+        return task
+
+    @classmethod
+    async def _prefetch(cls,
+                        query: SearchQuery,
+                        search_key: str,
+                        page: int,
+                        layout_preset: str):
+        try:
+            manager = await cls(query=query, page=page, layout_preset=layout_preset).async_init()
+            albums = manager.search_page_detail.get_albums()
+            # 只有一个结果时直接返回jm信息, 不需要搜索结果图片
+            if len(albums) <= 1:
+                return
+            # 后台预取不受延迟预算限制, 等待全部封面
+            image_bytes = await manager.create_page_img(progressive=False)
+            if image_bytes is None:
+                return
+            rendered = RenderedPage(album_ids=[album.get_album_id() for album in albums],
+                                    image=image_bytes,
+                                    page=manager.page,
+                                    max_page=manager.max_page,
+                                    prefetched=True)
+            rendered_page_cache.set(search_key, manager.page, rendered, alias=page)
+            logger.debug(f"jm搜索预取完成 {search_key} page {page}, {prefetch_stats}")
+        except asyncio.CancelledError:
+            prefetch_stats.cancelled += 1
+            raise
+        except Exception as e:
+            logger.warning(f"jm搜索预取失败 {search_key} page {page}", e=e)
+
+    @classmethod
+    async def wait_prefetch(cls, search_key: str, page: int):
+        """
+        等待正在进行的对应页预取完成
+        """
+        task = cls._prefetch_tasks.get((search_key, page))
+        if task is not None:
+            with suppress(Exception, asyncio.CancelledError):
+                await asyncio.shield(task)
+
+    @classmethod
+    def cancel_prefetch(cls, search_key: str):
+        """
+        取消该搜索字符串所有正在进行的预取
+        """
+        for (key, _), task in list(cls._prefetch_tasks.items()):
+            if key == search_key:
+                task.cancel()
+
+    @classmethod
+    def switch_session_search(cls, session_key: str, search_key: str):
+        """
+        记录会话的最新搜索, 会话换了搜索内容时取消旧搜索的预取
+        """
+        previous = cls._session_searches.get(session_key)
+        if previous is not None and previous != search_key:
+            cls.cancel_prefetch(previous)
+        cls._session_searches[session_key] = search_key
 
     async def get_max_page(self) -> int:
         """
@@ -249,254 +409,62 @@ class JmSearchPageManager:
         """
         return self.page <= self.max_page
 
-    async def create_page_img(self):
+    async def create_page_img(self, progressive: bool = PROGRESSIVE_ENABLED) -> bytes | None:
         """
-        创建包含搜索结果信息的图片
+        创建包含搜索结果信息的图片, 返回压缩后的jpeg数据
         自适应布局
         动态缩放
+        封面在事件循环中并发下载, 绘制和压缩在渲染进程中执行
+        :param progressive: 渐进渲染, 满足完整度/耗时预算后不再等待剩余封面
         """
-        search_page_detail = await self.get_page_info()
-        if not search_page_detail or not search_page_detail.get_albums():
+        albums = self.search_page_detail.get_albums() if self.search_page_detail else []
+        if not albums:
             logger.error("没有本子信息可供生成图片。")
             return None
 
-        def resize_and_crop_background(img: Image.Image, target_size: tuple[int, int]) -> Image.Image:
-            """
-            等比例缩放背景图至刚好覆盖目标尺寸，然后居中裁剪。
-            """
-            target_width, target_height = target_size
-            target_ratio = target_width / target_height
-            img_width, img_height = img.size
-            img_ratio = img_width / img_height
-            if img_ratio > target_ratio:
-                scale_h = target_height / img_height
-                scaled_width, scaled_height = int(img_width * scale_h), target_height
-                img = img.resize((scaled_width, scaled_height), Image.Resampling.LANCZOS)
-                left = (scaled_width - target_width) // 2
-                img = img.crop((left, 0, left + target_width, scaled_height))
-            else:
-                scale_w = target_width / img_width
-                scaled_width, scaled_height = target_width, int(img_height * scale_w)
-                img = img.resize((scaled_width, scaled_height), Image.Resampling.LANCZOS)
-                top = (scaled_height - target_height) // 2
-                img = img.crop((0, top, scaled_width, top + target_height))
-            return img
-
-        def resize_cover_to_fill(img: Image.Image, target_size: tuple[int, int]) -> Image.Image:
-            """
-            等比例缩放封面图至刚好填满目标尺寸框，然后居中裁剪，确保无拉伸。
-            """
-            target_width, target_height = target_size
-            target_ratio = target_width / target_height
-            img_width, img_height = img.size
-            img_ratio = img_width / img_height
-            if img_ratio > target_ratio:
-                scale_h = target_height / img_height
-                scaled_width, scaled_height = int(img_width * scale_h), target_height
-                img = img.resize((scaled_width, scaled_height), Image.Resampling.LANCZOS)
-                left = (scaled_width - target_width) // 2
-                return img.crop((left, 0, left + target_width, scaled_height))
-            else:
-                scale_w = target_width / img_width
-                scaled_width, scaled_height = target_width, int(img_height * scale_w)
-                img = img.resize((scaled_width, scaled_height), Image.Resampling.LANCZOS)
-                top = (scaled_height - target_height) // 2
-                return img.crop((0, top, scaled_width, top + target_height))
-
-        # 定义基准尺寸和最大布局
-        albums = search_page_detail.get_albums()
-        num_albums = len(albums)
-
-        BASE_COVER_SIZE = (150, 200)
-        BASE_TEXT_AREA_WIDTH = 500
-        BASE_ITEM_WIDTH = BASE_COVER_SIZE[0] + BASE_TEXT_AREA_WIDTH
-        BASE_ITEM_HEIGHT = BASE_COVER_SIZE[1]
-        BASE_ITEMS_PER_COL = 20
-        BASE_COLUMN_SPACING = 50
-        BASE_ROW_SPACING = 30
-        BASE_PADDING = 100
-        BASE_FOOTER_HEIGHT = 120
-        BASE_ID_FONT_SIZE, BASE_TITLE_FONT_SIZE, BASE_TAGS_FONT_SIZE, BASE_PAGE_FONT_SIZE = 36, 20, 22, 97
-        MAX_COLS = 4
-
-        # 计算固定画布尺寸
-        max_content_width = (BASE_ITEM_WIDTH * MAX_COLS) + (BASE_COLUMN_SPACING * (MAX_COLS - 1))
-        max_content_height = (BASE_ITEM_HEIGHT * BASE_ITEMS_PER_COL) + (BASE_ROW_SPACING * (BASE_ITEMS_PER_COL - 1))
-        canvas_width = max_content_width + 2 * BASE_PADDING
-        canvas_height = max_content_height + BASE_PADDING + BASE_FOOTER_HEIGHT
-
-        # 寻找最佳布局以最大化缩放
-        if num_albums == 0:
-            best_layout = (1, 1)
-            best_scale_factor = 1.0
-        else:
-            best_layout = (1, num_albums)
-            best_scale_factor = 0.0
-            # 遍历所有可能的列数
-            for c in range(1, MAX_COLS + 1):
-                if c > num_albums: break
-                r = math.ceil(num_albums / c)
-                if r > BASE_ITEMS_PER_COL: continue  # 避免过于细长的列
-
-                # 计算当前布局(c,r)在基准尺寸下的宽高
-                unscaled_w = (BASE_ITEM_WIDTH * c) + (BASE_COLUMN_SPACING * (c - 1))
-                unscaled_h = (BASE_ITEM_HEIGHT * r) + (BASE_ROW_SPACING * (r - 1))
-
-                # 计算能让这个布局恰好填满画布的缩放因子
-                scale_w = max_content_width / unscaled_w
-                scale_h = max_content_height / unscaled_h
-                current_scale = min(scale_w, scale_h)
-
-                # 采用能够最大缩放的布局
-                if current_scale > best_scale_factor:
-                    best_scale_factor = current_scale
-                    best_layout = (c, r)
-
-        actual_cols, rows_in_tallest_column = best_layout
-        scale_factor = best_scale_factor
-
-        # 应用缩放因子，生成最终尺寸
-        COVER_SIZE = (int(BASE_COVER_SIZE[0] * scale_factor), int(BASE_COVER_SIZE[1] * scale_factor))
-        TEXT_AREA_WIDTH = int(BASE_TEXT_AREA_WIDTH * scale_factor)
-        ITEM_WIDTH = COVER_SIZE[0] + TEXT_AREA_WIDTH
-        ITEM_HEIGHT = COVER_SIZE[1]
-        COLUMN_SPACING = int(BASE_COLUMN_SPACING * scale_factor)
-        ROW_SPACING = int(BASE_ROW_SPACING * scale_factor)
-        ID_FONT_SIZE = int(BASE_ID_FONT_SIZE * scale_factor)
-        TITLE_FONT_SIZE = int(BASE_TITLE_FONT_SIZE * scale_factor)
-        TAGS_FONT_SIZE = int(BASE_TAGS_FONT_SIZE * scale_factor)
-        ORDINAL_FONT_SIZE = int(ITEM_HEIGHT * 0.85)  # 新增：序号字体大小
-
-        #  计算居中偏移量
-        scaled_content_width = (ITEM_WIDTH * actual_cols) + (COLUMN_SPACING * (actual_cols - 1))
-        scaled_content_height = (ITEM_HEIGHT * rows_in_tallest_column) + (ROW_SPACING * (rows_in_tallest_column - 1))
-        content_start_x = BASE_PADDING + (max_content_width - scaled_content_width) // 2
-        content_start_y = BASE_PADDING + (max_content_height - scaled_content_height) // 2
-
-        # 绘制
-        def _get_title_lines(text: str, font: ImageFont.FreeTypeFont, max_width: int) -> list[str]:
-            """
-            将标题处理为最多两行，第二行超长则截断
-            """
-            lines, ellipsis = [], "..."
-            ellipsis_width = font.getlength(ellipsis)
-            if font.getlength(text) <= max_width: return [text]
-            first_line_end_index = 0
-            for i, char in enumerate(text):
-                if font.getlength(text[:i + 1]) > max_width: first_line_end_index = i; break
-            lines.append(text[:first_line_end_index])
-            second_line_raw = text[first_line_end_index:]
-            if font.getlength(second_line_raw) <= max_width:
-                lines.append(second_line_raw)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        cover_tasks = {asyncio.create_task(cover_fetcher.fetch(album.get_album_id())): index
+                       for index, album in enumerate(albums)}
+
+        pending = set(cover_tasks)
+        while pending:
+            if progressive:
+                elapsed = loop.time() - start
+                completeness = 1 - len(pending) / len(cover_tasks)
+                if elapsed >= PROGRESSIVE_COVER_DEADLINE:
+                    break
+                if completeness >= PROGRESSIVE_MIN_COMPLETENESS and elapsed >= PROGRESSIVE_LATENCY_BUDGET:
+                    break
+                # 完整度已满足时等到耗时预算为止, 否则等到封面截止时间为止
+                wake_at = PROGRESSIVE_LATENCY_BUDGET if completeness >= PROGRESSIVE_MIN_COMPLETENESS \
+                    else PROGRESSIVE_COVER_DEADLINE
+                timeout = max(wake_at - elapsed, 0)
             else:
-                truncated_second_line = ""
-                for char in second_line_raw:
-                    if font.getlength(truncated_second_line + char) <= max_width - ellipsis_width:
-                        truncated_second_line += char
-                    else:
-                        break
-                lines.append(truncated_second_line + ellipsis)
-            return lines
-
-        def _truncate_text(text: str, font: ImageFont.FreeTypeFont, max_width: int) -> str:
-            """
-            如果文本超过最大宽度，则截断并添加省略号
-            """
-            if font.getlength(text) <= max_width: return text
-            ellipsis = "..."
-            ellipsis_width = font.getlength(ellipsis)
-            for i in range(len(text) - 1, 0, -1):
-                if font.getlength(text[:i]) + ellipsis_width <= max_width: return text[:i] + ellipsis
-            return ellipsis
-
-        try:
-            canvas_base_raw = Image.open(
-                os.path.dirname(os.path.abspath(__file__)) + "/jmcomic_favourite_background.png").convert("RGBA")
-            canvas_base = resize_and_crop_background(canvas_base_raw, (canvas_width, canvas_height))
-        except FileNotFoundError:
-            logger.error("背景图片未找到，使用纯白背景。")
-            canvas_base = Image.new("RGBA", (canvas_width, canvas_height), (255, 255, 255, 255))
-
-        canvas = Image.new("RGBA", canvas_base.size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(canvas)
-
-        try:
-            font_path = os.path.dirname(os.path.abspath(__file__))
-            id_font = ImageFont.truetype(font_path + "/msyh.ttc", ID_FONT_SIZE)
-            title_font = ImageFont.truetype(font_path + "/msyh.ttc", TITLE_FONT_SIZE)
-            tags_font = ImageFont.truetype(font_path + "/msyh.ttc", TAGS_FONT_SIZE)
-            page_font = ImageFont.truetype(font_path + "/baibaipanpanwudikeai.ttf", BASE_PAGE_FONT_SIZE)
-            ordinal_font = ImageFont.truetype(font_path + "/msyh.ttc", ORDINAL_FONT_SIZE)  # 新增：加载序号字体
-        except IOError:
-            logger.error("字体文件加载失败，使用默认字体。")
-            id_font = title_font = tags_font = page_font = ordinal_font = ImageFont.load_default()
-
-        draw.rounded_rectangle((BASE_PADDING - 25, BASE_PADDING - 25, BASE_PADDING + max_content_width + 25,
-                                BASE_PADDING + max_content_height + 25), radius=30, fill=(0, 0, 0, 20))
-
-        for index, album in enumerate(albums):
-            col, row = index // rows_in_tallest_column, index % rows_in_tallest_column
-            item_x = content_start_x + col * (ITEM_WIDTH + COLUMN_SPACING)
-            item_y = content_start_y + row * (ITEM_HEIGHT + ROW_SPACING)
-
-            draw.rounded_rectangle((item_x - 10, item_y - 10, item_x + ITEM_WIDTH + 10, item_y + ITEM_HEIGHT + 10),
-                                   radius=20, fill=(0, 0, 0, 30))
-
-            # 绘制背景序号
-            ordinal_text = str(index + 1)
-            ordinal_x = item_x + ITEM_WIDTH - int(15 * scale_factor)
-            ordinal_y = item_y + ITEM_HEIGHT // 2
-            draw.text(
-                (ordinal_x, ordinal_y),
-                ordinal_text,
-                font=ordinal_font,
-                fill=(0, 0, 0, 70),  # 使用半透明的深灰色
-                anchor="rm"  # 右对齐，垂直居中
-            )
-
-            # 绘制封面
-            try:
-                cover_img_raw = Image.open(BytesIO(album.get_cover())).convert("RGB")
-                cover_img = resize_cover_to_fill(cover_img_raw, COVER_SIZE)
-                canvas.paste(cover_img, (item_x, item_y))
-            except Exception as e:
-                logger.error(f"警告: 封面加载失败 for {album.get_album_id()}. Error: {e}")
-                placeholder = Image.new('RGB', COVER_SIZE, (255, 80, 80))
-                ImageDraw.Draw(placeholder).text((10, 10), "Cover\nFailed", fill=(255, 255, 255))
-                canvas.paste(placeholder, (item_x, item_y))
-            # 绘制右侧的jm号、标题、标签
-            text_x = item_x + COVER_SIZE[0] + int(20 * scale_factor)
-            text_max_width = TEXT_AREA_WIDTH - int(40 * scale_factor)
-            current_y = item_y + int(15 * scale_factor)
-            draw.text((text_x, current_y), album.get_album_id(), font=id_font, fill=(0, 123, 255))
-            current_y += id_font.size + int(20 * scale_factor)
-            title_lines = _get_title_lines(album.get_title(), title_font, text_max_width)
-            for line in title_lines: draw.text((text_x, current_y), line, font=title_font,
-                                               fill=(0, 0, 0)); current_y += title_font.size * 2
-            current_y += int(5 * scale_factor)
-            tags_str = " / ".join(album.get_tags()) or "无标签"
-            truncated_tags = _truncate_text(tags_str, tags_font, text_max_width)
-            draw.text((text_x, current_y), truncated_tags, font=tags_font, fill=(20, 90, 180))
-
-        # 绘制页脚页码
-        page_text = f"{self.page} / {self.max_page}"
-        page_text_length = page_font.getlength(page_text)
-        page_x = (canvas_width - page_text_length) // 2
-        page_y = canvas_height - BASE_FOOTER_HEIGHT + (BASE_FOOTER_HEIGHT - BASE_PAGE_FONT_SIZE) // 2 + 10
-        draw.text((page_x, page_y), page_text, font=page_font, fill=(10, 115, 212))
-
-        result = Image.alpha_composite(canvas_base, canvas)
-        final_for_show = Image.new("RGB", result.size, (255, 255, 255))
-        final_for_show.paste(result, (0, 0), result)
-
-        # result.save("search_output.png") # 用于调试时保存
-        return final_for_show
+                timeout = None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                albums[cover_tasks[task]].set_cover(task.result())
+
+        if pending:
+            # 超时的封面使用占位图, 下载任务继续在后台完成以填充封面缓存
+            logger.info(f"jm搜索 {len(pending)}/{len(cover_tasks)} 个封面未在预算内完成, 使用占位图")
+
+        spec = SearchPageSpec(
+            layout=get_layout(len(albums), self.layout_preset),
+            albums=tuple((album.get_album_id(), album.get_title(), tuple(album.get_tags())) for album in albums),
+            page=self.page,
+            max_page=self.max_page,
+            mode=RENDER_MODE,
+        )
+        covers = [album.get_cover() if task not in pending else b"" for task, album in zip(cover_tasks, albums)]
+        return await render_pool.run(render_search_page, spec, covers)
 
 
 if __name__ == '__main__':
     # 测试
     async def main():
-        page = await JmSearchPageManager(search_params=["萝莉", "全彩"], filter_params=["3D", "皮物"],
+        page = await JmSearchPageManager(query=SearchQuery.build(["萝莉", "全彩"], ["3D", "皮物"]),
                                          page=1).async_init()
         print(page.check())
         print(page.max_page)
@@ -0,0 +1,257 @@
+import math
+from dataclasses import dataclass, replace
+from functools import lru_cache
+
+# 每页搜索最大本子数量
+MAX_ALBUM_NUMBER = 80
+
+
+@dataclass(frozen=True)
+class LayoutPreset:
+    """
+    搜索结果图片布局预设
+    :param name: 预设名
+    :param max_cols: 最大列数
+    :param items_per_col: 每列最多本子数
+    :param base_scale: 基准尺寸缩放, 小于1时画布更小、内存占用更低
+    :param output_size: 输出图片尺寸, 高度为0时按画布比例计算
+    :param output_kb: 输出图片大小上限(KB)
+    """
+    name: str
+    max_cols: int
+    items_per_col: int
+    base_scale: float
+    output_size: tuple[int, int]
+    output_kb: int
+
+
+DEFAULT_PRESET = "default"
+
+PRESETS: dict[str, LayoutPreset] = {preset.name: preset for preset in (
+    # 4列, 每列最多20个
+    LayoutPreset(DEFAULT_PRESET, max_cols=4, items_per_col=20, base_scale=1.0,
+                 output_size=(1360, 2001), output_kb=4096),
+    # 手机竖屏, 2列长图
+    LayoutPreset("mobile-narrow", max_cols=2, items_per_col=40, base_scale=1.0,
+                 output_size=(1080, 0), output_kb=4096),
+    # 电脑宽屏, 8列
+    LayoutPreset("desktop-wide", max_cols=8, items_per_col=10, base_scale=1.0,
+                 output_size=(2560, 0), output_kb=4096),
+    # 与默认相同的排列, 画布缩小一半
+    LayoutPreset("low-memory", max_cols=4, items_per_col=20, base_scale=0.5,
+                 output_size=(1000, 0), output_kb=2048),
+)}
+
+
+def get_preset(name: str | None) -> LayoutPreset:
+    """
+    获取预设, 名称无效时使用默认预设
+    """
+    return PRESETS.get(name or DEFAULT_PRESET, PRESETS[DEFAULT_PRESET])
+
+
+@dataclass(frozen=True)
+class SearchPageLayout:
+    """
+    搜索结果图片布局
+    根据本子数量寻找能最大化缩放的(列数, 行数), 并计算缩放后的各项尺寸
+    只与本子数量和预设有关, 通过get_layout获取缓存的结果
+    """
+    canvas_width: int
+    canvas_height: int
+    max_content_width: int
+    max_content_height: int
+    padding: int
+    footer_height: int
+    cols: int
+    rows: int
+    scale_factor: float
+    # 绘制间距等细节尺寸时使用的缩放
+    unit: float
+    cover_size: tuple[int, int]
+    text_area_width: int
+    item_width: int
+    item_height: int
+    column_spacing: int
+    row_spacing: int
+    content_start_x: int
+    content_start_y: int
+    id_font_size: int
+    title_font_size: int
+    tags_font_size: int
+    page_font_size: int
+    ordinal_font_size: int
+    output_size: tuple[int, int]
+    output_kb: int
+    # 画布相对完整尺寸的缩放, 绘制外框、圆角等固定尺寸时使用
+    canvas_scale: float = 1.0
+
+    @classmethod
+    def compute(cls, num_albums: int, preset: LayoutPreset) -> "SearchPageLayout":
+        def base(value: int) -> int:
+            return round(value * preset.base_scale)
+
+        BASE_COVER_SIZE = (base(150), base(200))
+        BASE_TEXT_AREA_WIDTH = base(500)
+        BASE_ITEM_WIDTH = BASE_COVER_SIZE[0] + BASE_TEXT_AREA_WIDTH
+        BASE_ITEM_HEIGHT = BASE_COVER_SIZE[1]
+        BASE_ITEMS_PER_COL = preset.items_per_col
+        BASE_COLUMN_SPACING = base(50)
+        BASE_ROW_SPACING = base(30)
+        BASE_PADDING = base(100)
+        BASE_FOOTER_HEIGHT = base(120)
+        BASE_ID_FONT_SIZE, BASE_TITLE_FONT_SIZE, BASE_TAGS_FONT_SIZE, BASE_PAGE_FONT_SIZE = \
+            base(36), base(20), base(22), base(97)
+        MAX_COLS = preset.max_cols
+
+        # 计算固定画布尺寸
+        max_content_width = (BASE_ITEM_WIDTH * MAX_COLS) + (BASE_COLUMN_SPACING * (MAX_COLS - 1))
+        max_content_height = (BASE_ITEM_HEIGHT * BASE_ITEMS_PER_COL) + (BASE_ROW_SPACING * (BASE_ITEMS_PER_COL - 1))
+        canvas_width = max_content_width + 2 * BASE_PADDING
+        canvas_height = max_content_height + BASE_PADDING + BASE_FOOTER_HEIGHT
+
+        # 寻找最佳布局以最大化缩放
+        if num_albums == 0:
+            best_layout = (1, 1)
+            best_scale_factor = 1.0
+        else:
+            best_layout = (1, num_albums)
+            best_scale_factor = 0.0
+            # 遍历所有可能的列数
+            for c in range(1, MAX_COLS + 1):
+                if c > num_albums: break
+                r = math.ceil(num_albums / c)
+                if r > BASE_ITEMS_PER_COL: continue  # 避免过于细长的列
+
+                # 计算当前布局(c,r)在基准尺寸下的宽高
+                unscaled_w = (BASE_ITEM_WIDTH * c) + (BASE_COLUMN_SPACING * (c - 1))
+                unscaled_h = (BASE_ITEM_HEIGHT * r) + (BASE_ROW_SPACING * (r - 1))
+
+                # 计算能让这个布局恰好填满画布的缩放因子
+                scale_w = max_content_width / unscaled_w
+                scale_h = max_content_height / unscaled_h
+                current_scale = min(scale_w, scale_h)
+
+                # 采用能够最大缩放的布局
+                if current_scale > best_scale_factor:
+                    best_scale_factor = current_scale
+                    best_layout = (c, r)
+
+        actual_cols, rows_in_tallest_column = best_layout
+        scale_factor = best_scale_factor
+
+        # 应用缩放因子，生成最终尺寸
+        cover_size = (int(BASE_COVER_SIZE[0] * scale_factor), int(BASE_COVER_SIZE[1] * scale_factor))
+        text_area_width = int(BASE_TEXT_AREA_WIDTH * scale_factor)
+        item_width = cover_size[0] + text_area_width
+        item_height = cover_size[1]
+        column_spacing = int(BASE_COLUMN_SPACING * scale_factor)
+        row_spacing = int(BASE_ROW_SPACING * scale_factor)
+
+        #  计算居中偏移量
+        scaled_content_width = (item_width * actual_cols) + (column_spacing * (actual_cols - 1))
+        scaled_content_height = (item_height * rows_in_tallest_column) + (row_spacing * (rows_in_tallest_column - 1))
+
+        return cls(
+            canvas_width=canvas_width,
+            canvas_height=canvas_height,
+            max_content_width=max_content_width,
+            max_content_height=max_content_height,
+            padding=BASE_PADDING,
+            footer_height=BASE_FOOTER_HEIGHT,
+            cols=actual_cols,
+            rows=rows_in_tallest_column,
+            scale_factor=scale_factor,
+            unit=scale_factor * preset.base_scale,
+            cover_size=cover_size,
+            text_area_width=text_area_width,
+            item_width=item_width,
+            item_height=item_height,
+            column_spacing=column_spacing,
+            row_spacing=row_spacing,
+            content_start_x=BASE_PADDING + (max_content_width - scaled_content_width) // 2,
+            content_start_y=BASE_PADDING + (max_content_height - scaled_content_height) // 2,
+            id_font_size=int(BASE_ID_FONT_SIZE * scale_factor),
+            title_font_size=int(BASE_TITLE_FONT_SIZE * scale_factor),
+            tags_font_size=int(BASE_TAGS_FONT_SIZE * scale_factor),
+            page_font_size=BASE_PAGE_FONT_SIZE,
+            ordinal_font_size=int(item_height * 0.85),
+            output_size=(preset.output_size[0],
+                         preset.output_size[1] or round(preset.output_size[0] * canvas_height / canvas_width)),
+            output_kb=preset.output_kb,
+        )
+
+    def scaled(self, factor: float) -> "SearchPageLayout":
+        """
+        按比例缩放画布和其中所有尺寸, 输出尺寸不变
+        """
+
+        def px(value: int) -> int:
+            return max(round(value * factor), 1)
+
+        cover_size = (px(self.cover_size[0]), px(self.cover_size[1]))
+        text_area_width = px(self.text_area_width)
+        return replace(
+            self,
+            canvas_width=px(self.canvas_width),
+            canvas_height=px(self.canvas_height),
+            max_content_width=px(self.max_content_width),
+            max_content_height=px(self.max_content_height),
+            padding=px(self.padding),
+            footer_height=px(self.footer_height),
+            scale_factor=self.scale_factor * factor,
+            unit=self.unit * factor,
+            cover_size=cover_size,
+            text_area_width=text_area_width,
+            item_width=cover_size[0] + text_area_width,
+            item_height=cover_size[1],
+            column_spacing=px(self.column_spacing),
+            row_spacing=px(self.row_spacing),
+            content_start_x=px(self.content_start_x),
+            content_start_y=px(self.content_start_y),
+            id_font_size=px(self.id_font_size),
+            title_font_size=px(self.title_font_size),
+            tags_font_size=px(self.tags_font_size),
+            page_font_size=px(self.page_font_size),
+            ordinal_font_size=px(self.ordinal_font_size),
+            canvas_scale=self.canvas_scale * factor,
+        )
+
+    def item_position(self, index: int) -> tuple[int, int]:
+        """
+        第index个本子的左上角坐标, 按列排列
+        """
+        col, row = index // self.rows, index % self.rows
+        return (self.content_start_x + col * (self.item_width + self.column_spacing),
+                self.content_start_y + row * (self.item_height + self.row_spacing))
+
+
+@lru_cache(maxsize=None)
+def get_layout(num_albums: int, preset_name: str = DEFAULT_PRESET) -> SearchPageLayout:
+    """
+    获取本子数量和预设对应的布局
+    """
+    return SearchPageLayout.compute(num_albums, get_preset(preset_name))
+
+
+@lru_cache(maxsize=None)
+def get_output_layout(layout: SearchPageLayout) -> SearchPageLayout:
+    """
+    按输出宽度缩小的布局, 直接以接近输出的尺寸绘制, 不需要先绘制完整画布再缩小
+    输出不小于画布时返回原布局
+    """
+    if layout.output_size[0] >= layout.canvas_width:
+        return layout
+    return layout.scaled(layout.output_size[0] / layout.canvas_width)
+
+
+def precompute_layouts():
+    """
+    预先计算所有预设下1~MAX_ALBUM_NUMBER个本子的布局
+    """
+    for preset_name in PRESETS:
+        for num_albums in range(1, MAX_ALBUM_NUMBER + 1):
+            get_layout(num_albums, preset_name)
+
+
+precompute_layouts()
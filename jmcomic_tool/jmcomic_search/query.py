@@ -0,0 +1,200 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import ClassVar
+
+from zhenxun.configs.path_config import DATA_PATH
+from zhenxun.services.log import logger
+
+# 默认屏蔽的标签
+DEFAULT_EXCLUDES = ("AI绘图",)
+# 过滤配置保存路径
+PROFILE_PATH = DATA_PATH / "jmcomic" / "search_profiles.json"
+
+
+def parse_search_terms(search_str: str):
+    """
+    解析搜索字符串，返回包含项列表和排除项列表
+
+    参数:
+        search_str: 格式为"term1[+/-]term2[+/-]term3[+/-]term4[+/-]..."的字符串
+
+    返回:
+        包含元组: (包含列表, 排除列表)
+    """
+    include_terms = []
+    exclude_terms = []
+
+    if not search_str:
+        return include_terms, exclude_terms
+
+    """
+    先按减号分割字符串
+    分隔结果为两种
+    1. 单字符串, 该字符串原来被夹在两个“-”间
+    2. 含“+”号字符串
+    一定不会有含“-”的字符串
+    对于第二种字符串, 可以确定再次分隔后的第一个字符串为“-”后的字符串
+    """
+
+    first_str = ""
+    rest_str = ""
+    flag = True
+    for c in search_str:
+        if c == '+' or c == '-':
+            flag = False
+        if flag:
+            first_str += c
+        else:
+            rest_str += c
+
+    include_terms.append(first_str)
+
+    parts = rest_str.split('-')
+
+    for part in parts:
+        index = part.find("+")
+        if index == -1:
+            # 这是排除字符串
+            if len(part) > 0:
+                exclude_terms.append(part)
+        else:
+            # 再次分隔字符串
+            part_subs = part.split("+")
+            if len(part_subs[0]) > 0:
+                exclude_terms.append(part_subs[0])
+            # 剩余为包含字符串
+            for sub in part_subs[1:]:
+                include_terms.append(sub)
+
+    return include_terms, exclude_terms
+
+
+def _normalize_terms(terms) -> tuple[str, ...]:
+    """
+    去除空白和重复(忽略大小写)的搜索项, 按规范化后的字符串排序
+    重复项保留第一次出现的写法
+    """
+    unique: dict[str, str] = {}
+    for term in terms:
+        term = term.strip()
+        if term:
+            unique.setdefault(term.casefold(), term)
+    return tuple(unique[key] for key in sorted(unique))
+
+
+@dataclass(frozen=True)
+class FilterProfile:
+    """
+    保存的搜索过滤配置, 每次搜索时附加
+    :param include: 附加的包含项
+    :param exclude: 附加的屏蔽项
+    """
+    include: tuple[str, ...] = ()
+    exclude: tuple[str, ...] = ()
+
+    def __str__(self) -> str:
+        return " ".join([*(f"+{term}" for term in self.include), *(f"-{term}" for term in self.exclude)]) or "无"
+
+
+@dataclass(frozen=True)
+class SearchQuery:
+    """
+    规范化的搜索条件
+    搜索项的顺序、大小写和重复不影响结果, 逻辑上相同的搜索得到相同的cache_key和site_query
+    :param include: 包含项
+    :param exclude: 屏蔽项
+    """
+    include: tuple[str, ...]
+    exclude: tuple[str, ...] = field(default=DEFAULT_EXCLUDES)
+
+    @classmethod
+    def build(cls, include, exclude, profile: FilterProfile | None = None) -> "SearchQuery":
+        """
+        合并用户输入、过滤配置和默认屏蔽项
+        同时出现在包含项和屏蔽项中的标签以包含项为准
+        """
+        if profile is not None:
+            include = [*include, *profile.include]
+            exclude = [*exclude, *profile.exclude]
+        include = _normalize_terms(include)
+        included = {term.casefold() for term in include}
+        exclude = tuple(term for term in _normalize_terms([*exclude, *DEFAULT_EXCLUDES])
+                        if term.casefold() not in included)
+        return cls(include=include, exclude=exclude)
+
+    @classmethod
+    def parse(cls, search_str: str, profile: FilterProfile | None = None) -> "SearchQuery":
+        """
+        解析jm搜索指令的搜索字符串
+        """
+        include, exclude = parse_search_terms(search_str)
+        return cls.build(include, exclude, profile)
+
+    @property
+    def site_query(self) -> str:
+        """
+        提交给网站的搜索字符串
+        """
+        return " ".join([*(f"+{term}" for term in self.include), *(f"-{term}" for term in self.exclude)])
+
+    @property
+    def cache_key(self) -> str:
+        """
+        缓存键, 忽略大小写
+        """
+        return self.site_query.casefold()
+
+    def __str__(self) -> str:
+        return self.site_query
+
+
+class FilterProfileStore:
+    """
+    按群(私聊按用户)保存的搜索过滤配置, 存储于DATA_PATH/jmcomic/search_profiles.json
+    """
+    # 群或用户 -> 过滤配置
+    _profiles: ClassVar[dict[str, FilterProfile] | None] = None
+
+    @staticmethod
+    def owner_key(group_id: str | None, user_id: str) -> str:
+        return f"group_{group_id}" if group_id else f"user_{user_id}"
+
+    @classmethod
+    def _load(cls) -> dict[str, FilterProfile]:
+        if cls._profiles is None:
+            cls._profiles = {}
+            try:
+                data = json.loads(PROFILE_PATH.read_text(encoding="utf-8"))
+                for key, value in data.items():
+                    cls._profiles[key] = FilterProfile(include=tuple(value.get("include", ())),
+                                                       exclude=tuple(value.get("exclude", ())))
+            except FileNotFoundError:
+                pass
+            except (ValueError, AttributeError) as e:
+                logger.error(f"jm搜索过滤配置读取失败: {e}")
+        return cls._profiles
+
+    @classmethod
+    def _save_sync(cls, data: dict):
+        PROFILE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = PROFILE_PATH.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp_path.replace(PROFILE_PATH)
+
+    @classmethod
+    def get(cls, key: str) -> FilterProfile | None:
+        return cls._load().get(key)
+
+    @classmethod
+    async def set(cls, key: str, profile: FilterProfile | None):
+        """
+        保存过滤配置, profile为None或为空时删除
+        """
+        profiles = cls._load()
+        if profile is None or not (profile.include or profile.exclude):
+            profiles.pop(key, None)
+        else:
+            profiles[key] = profile
+        data = {k: {"include": list(v.include), "exclude": list(v.exclude)} for k, v in profiles.items()}
+        await asyncio.to_thread(cls._save_sync, data)
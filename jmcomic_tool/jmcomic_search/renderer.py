@@ -0,0 +1,212 @@
+import os
+from dataclasses import dataclass, replace
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .layout import SearchPageLayout, get_output_layout
+from ..jmcomic_common import assets, encode_jpeg, fit_and_crop, render_logger, truncate_text, wrap_text
+
+# 素材目录
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# 渲染模式, rgb: 直接在RGB画布上混合绘制, rgba: 内容层与背景透明合成
+RENDER_MODE_RGB = "rgb"
+RENDER_MODE_RGBA = "rgba"
+# 外框、卡片、序号的透明度(叠加在背景上的最终效果)
+PANEL_ALPHA = 20
+CARD_ALPHA = 30
+ORDINAL_ALPHA = 70
+
+
+@dataclass(frozen=True)
+class SearchPageSpec:
+    """
+    搜索结果图片的渲染描述, 只包含可序列化的数据, 可以交给渲染进程执行
+    :param layout: 布局
+    :param albums: 每个本子的(jm号, 标题, 标签)
+    :param page: 当前页码
+    :param max_page: 最大页码
+    :param quality: 初始jpeg质量
+    :param mode: 渲染模式
+    """
+    layout: SearchPageLayout
+    albums: tuple[tuple[str, str, tuple[str, ...]], ...]
+    page: int
+    max_page: int
+    quality: int = 95
+    mode: str = RENDER_MODE_RGB
+
+
+def _blended_alpha(alpha: int, under: int) -> int:
+    """
+    叠加在透明度为under的半透明层上时, 使叠加结果等于直接覆盖alpha所需的透明度
+    """
+    return max(round(255 * (1 - (255 - alpha) / (255 - under))), 0)
+
+
+def _load_fonts(layout: SearchPageLayout):
+    """
+    加载jm号、标题、标签、页码、序号字体
+    """
+    try:
+        return (assets.font(ASSET_DIR + "/msyh.ttc", layout.id_font_size),
+                assets.font(ASSET_DIR + "/msyh.ttc", layout.title_font_size),
+                assets.font(ASSET_DIR + "/msyh.ttc", layout.tags_font_size),
+                assets.font(ASSET_DIR + "/baibaipanpanwudikeai.ttf", layout.page_font_size),
+                assets.font(ASSET_DIR + "/msyh.ttc", layout.ordinal_font_size))
+    except IOError:
+        render_logger.error("字体文件加载失败，使用默认字体。")
+        font = ImageFont.load_default()
+        return font, font, font, font, font
+
+
+def _load_background(layout: SearchPageLayout, mode: str) -> Image.Image:
+    try:
+        return assets.background(ASSET_DIR + "/jmcomic_favourite_background.png",
+                                 (layout.canvas_width, layout.canvas_height), mode)
+    except FileNotFoundError:
+        render_logger.error("背景图片未找到，使用纯白背景。")
+        return Image.new(mode, (layout.canvas_width, layout.canvas_height), "white")
+
+
+def _paste_ordinal(canvas: Image.Image, xy: tuple[int, int], text: str, font, alpha: int):
+    """
+    在RGB画布上以alpha透明度混合绘制黑色序号
+    RGB画布上绘制文字时Pillow会忽略颜色的透明度, 先将文字绘制为按透明度缩放的L蒙版再贴入
+    """
+    left, top, right, bottom = font.getbbox(text, anchor="rm")
+    if right <= left or bottom <= top:
+        return
+    mask = Image.new("L", (right - left, bottom - top), 0)
+    ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=alpha, anchor="rm")
+    canvas.paste((0, 0, 0), (xy[0] + left, xy[1] + top, xy[0] + right, xy[1] + bottom), mask)
+
+
+def draw_content(canvas: Image.Image, spec: SearchPageSpec, blend: bool):
+    """
+    绘制外框、卡片、序号、jm号、标题、标签和页码, 不包含封面
+    :param blend: 是否在RGB画布上混合绘制, 为True时半透明图形会叠加在已绘制的内容上,
+                  此时使用预先换算的透明度, 使结果与透明内容层合成一致
+    """
+    layout = spec.layout
+    draw = ImageDraw.Draw(canvas, "RGBA") if blend else ImageDraw.Draw(canvas)
+    id_font, title_font, tags_font, page_font, ordinal_font = _load_fonts(layout)
+    card_alpha = _blended_alpha(CARD_ALPHA, PANEL_ALPHA) if blend else CARD_ALPHA
+    ordinal_alpha = _blended_alpha(ORDINAL_ALPHA, CARD_ALPHA) if blend else ORDINAL_ALPHA
+
+    def px(value: int) -> int:
+        # 固定尺寸随画布缩放
+        return round(value * layout.canvas_scale)
+
+    padding = layout.padding
+    draw.rounded_rectangle((padding - px(25), padding - px(25), padding + layout.max_content_width + px(25),
+                            padding + layout.max_content_height + px(25)), radius=px(30),
+                           fill=(0, 0, 0, PANEL_ALPHA))
+
+    unit = layout.unit
+    for index, (album_id, title, tags) in enumerate(spec.albums):
+        item_x, item_y = layout.item_position(index)
+
+        draw.rounded_rectangle((item_x - px(10), item_y - px(10), item_x + layout.item_width + px(10),
+                                item_y + layout.item_height + px(10)), radius=px(20), fill=(0, 0, 0, card_alpha))
+
+        # 绘制背景序号
+        ordinal_text = str(index + 1)
+        ordinal_x = item_x + layout.item_width - int(15 * unit)
+        ordinal_y = item_y + layout.item_height // 2
+        if blend:
+            _paste_ordinal(canvas, (ordinal_x, ordinal_y), ordinal_text, ordinal_font, ordinal_alpha)
+        else:
+            draw.text(
+                (ordinal_x, ordinal_y),
+                ordinal_text,
+                font=ordinal_font,
+                fill=(0, 0, 0, ordinal_alpha),  # 使用半透明的深灰色
+                anchor="rm"  # 右对齐，垂直居中
+            )
+
+        # 绘制右侧的jm号、标题、标签
+        text_x = item_x + layout.cover_size[0] + int(20 * unit)
+        text_max_width = layout.text_area_width - int(40 * unit)
+        current_y = item_y + int(15 * unit)
+        draw.text((text_x, current_y), album_id, font=id_font, fill=(0, 123, 255))
+        current_y += id_font.size + int(20 * unit)
+        title_lines = wrap_text(title, title_font, text_max_width, max_lines=2)
+        for line in title_lines: draw.text((text_x, current_y), line, font=title_font,
+                                           fill=(0, 0, 0)); current_y += title_font.size * 2
+        current_y += int(5 * unit)
+        tags_str = " / ".join(tags) or "无标签"
+        truncated_tags = truncate_text(tags_str, tags_font, text_max_width)
+        draw.text((text_x, current_y), truncated_tags, font=tags_font, fill=(20, 90, 180))
+
+    # 绘制页脚页码
+    page_text = f"{spec.page} / {spec.max_page}"
+    page_text_length = page_font.getlength(page_text)
+    page_x = (layout.canvas_width - page_text_length) // 2
+    page_y = layout.canvas_height - layout.footer_height + (
+            layout.footer_height - layout.page_font_size) // 2 + px(10)
+    draw.text((page_x, page_y), page_text, font=page_font, fill=(10, 115, 212))
+
+
+def paste_covers(canvas: Image.Image, layout: SearchPageLayout, covers: list[bytes]):
+    """
+    将封面贴入画布, 封面为空或无法解析时使用占位图
+    :param covers: 按本子顺序排列的封面二进制数据
+    """
+    for index, cover in enumerate(covers):
+        item_x, item_y = layout.item_position(index)
+        try:
+            if not cover:
+                raise ValueError("封面为空")
+            cover_img_raw = Image.open(BytesIO(cover)).convert("RGB")
+            cover_img = fit_and_crop(cover_img_raw, layout.cover_size)
+            canvas.paste(cover_img, (item_x, item_y))
+        except Exception as e:
+            render_logger.error(f"警告: 封面加载失败 for index {index + 1}. Error: {e}")
+            placeholder = Image.new('RGB', layout.cover_size, (255, 80, 80))
+            ImageDraw.Draw(placeholder).text((10, 10), "Cover\nFailed", fill=(255, 255, 255))
+            canvas.paste(placeholder, (item_x, item_y))
+
+
+def render_rgba(spec: SearchPageSpec, covers: list[bytes]) -> Image.Image:
+    """
+    在透明内容层上绘制, 再与RGBA背景合成后转为RGB
+    """
+    canvas_base = _load_background(spec.layout, "RGBA")
+    canvas = Image.new("RGBA", canvas_base.size, (0, 0, 0, 0))
+    draw_content(canvas, spec, blend=False)
+    paste_covers(canvas, spec.layout, covers)
+
+    result = Image.alpha_composite(canvas_base, canvas)
+    final_for_show = Image.new("RGB", result.size, (255, 255, 255))
+    final_for_show.paste(result, (0, 0), result)
+
+    # result.save("search_output.png") # 用于调试时保存
+    return final_for_show
+
+
+def render_rgb(spec: SearchPageSpec, covers: list[bytes]) -> Image.Image:
+    """
+    直接在RGB背景上混合绘制, 只有一张画布
+    """
+    canvas = _load_background(spec.layout, "RGB")
+    draw_content(canvas, spec, blend=True)
+    paste_covers(canvas, spec.layout, covers)
+    return canvas
+
+
+def render_search_page(spec: SearchPageSpec, covers: list[bytes]) -> bytes | None:
+    """
+    渲染搜索结果图片并编码为jpeg, 可在渲染进程中执行
+    rgb模式直接按输出宽度绘制, 不需要缩小完整画布; rgba模式绘制完整画布后缩小到输出尺寸
+    :param spec: 渲染描述
+    :param covers: 按本子顺序排列的封面二进制数据, 空bytes表示使用占位图
+    """
+    if spec.mode == RENDER_MODE_RGBA:
+        image = render_rgba(spec, covers)
+    else:
+        image = render_rgb(replace(spec, layout=get_output_layout(spec.layout)), covers)
+    return encode_jpeg(image, spec.layout.output_size, spec.layout.output_kb, spec.quality)
+
@@ -0,0 +1,247 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from zhenxun.services.log import logger
+
+from .config import (RESULT_CACHE_BACKEND, RESULT_CACHE_TTL, RESULT_CACHE_MAX_ENTRIES, REDIS_HOST, REDIS_PORT,
+                     REDIS_PASSWORD, REDIS_DB, REDIS_MAX_CONNECTIONS, RENDER_CACHE_TTL, RENDER_CACHE_MAX_BYTES)
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+
+class ResultCache(ABC):
+    """
+    搜索结果缓存
+    以搜索结果消息id为键, 保存该次搜索的jm号列表
+    """
+
+    @abstractmethod
+    async def set(self, key: str | int, album_ids: list[str]):
+        ...
+
+    @abstractmethod
+    async def get(self, key: str | int) -> list[str] | None:
+        """
+        获取缓存的jm号列表, 不存在或已过期时返回None
+        """
+        ...
+
+
+class MemoryResultCache(ResultCache):
+    """
+    进程内缓存, 带有效期, 超出最大条目数时淘汰最久未使用的结果
+    """
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (过期时间, jm号列表)
+        self._data: OrderedDict[str, tuple[float, list[str]]] = OrderedDict()
+
+    async def set(self, key: str | int, album_ids: list[str]):
+        key = str(key)
+        self._data[key] = (time.monotonic() + self.ttl, list(album_ids))
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def get(self, key: str | int) -> list[str] | None:
+        key = str(key)
+        cached = self._data.get(key)
+        if cached is None:
+            return None
+        expire_at, album_ids = cached
+        if time.monotonic() > expire_at:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return album_ids
+
+
+class RedisResultCache(ResultCache):
+    """
+    redis缓存, 所有请求共享同一个连接池
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        pool = aioredis.ConnectionPool(host=REDIS_HOST,
+                                       port=REDIS_PORT,
+                                       db=REDIS_DB,
+                                       password=REDIS_PASSWORD,
+                                       max_connections=REDIS_MAX_CONNECTIONS,
+                                       decode_responses=True)
+        self._client = aioredis.Redis(connection_pool=pool)
+
+    async def set(self, key: str | int, album_ids: list[str]):
+        if not album_ids:
+            return
+        key = str(key)
+        async with self._client.pipeline(transaction=True) as pipe:
+            await pipe.delete(key).rpush(key, *album_ids).expire(key, self.ttl).execute()
+
+    async def get(self, key: str | int) -> list[str] | None:
+        album_ids = await self._client.lrange(str(key), 0, -1)
+        return album_ids or None
+
+
+_result_cache: ResultCache | None = None
+
+
+def get_result_cache() -> ResultCache:
+    """
+    获取配置的搜索结果缓存
+    """
+    global _result_cache
+    if _result_cache is None:
+        if RESULT_CACHE_BACKEND == "redis" and aioredis is not None:
+            _result_cache = RedisResultCache(RESULT_CACHE_TTL)
+        else:
+            if RESULT_CACHE_BACKEND == "redis":
+                logger.warning("未安装redis, jm搜索结果缓存使用进程内缓存")
+            _result_cache = MemoryResultCache(RESULT_CACHE_TTL, RESULT_CACHE_MAX_ENTRIES)
+    return _result_cache
+
+
+@dataclass
+class RenderedPage:
+    """
+    已渲染的搜索结果页
+    :param album_ids: 搜索结果jm号列表
+    :param image: 最终发送的jpeg图片
+    :param page: 实际页码
+    :param max_page: 最大页码
+    :param prefetched: 是否为预取结果
+    :param used: 预取结果是否已被使用
+    """
+    album_ids: list[str]
+    image: bytes
+    page: int
+    max_page: int
+    prefetched: bool = False
+    used: bool = False
+
+
+class PrefetchStats:
+    """
+    预取统计
+    """
+
+    def __init__(self):
+        # 已开始的预取
+        self.started = 0
+        # 被使用的预取结果
+        self.hits = 0
+        # 未被使用就过期或被淘汰的预取结果
+        self.wasted = 0
+        # 被取消的预取
+        self.cancelled = 0
+
+    def __str__(self) -> str:
+        return f"预取 {self.started} 次, 命中 {self.hits}, 浪费 {self.wasted}, 取消 {self.cancelled}"
+
+
+prefetch_stats = PrefetchStats()
+
+
+class RenderedPageCache:
+    """
+    已渲染搜索结果页缓存
+    以(搜索缓存键, 页码)为键, 带有效期, 图片总大小超出预算时淘汰最久未使用的结果
+    请求的页码超出范围时以实际页码保存, 请求的页码作为别名指向同一条缓存, 不重复计算大小
+    """
+
+    def __init__(self, ttl: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        # (搜索缓存键, 页码) -> (过期时间, 渲染结果)
+        self._data: OrderedDict[tuple[str, int], tuple[float, RenderedPage]] = OrderedDict()
+        # 别名 -> 实际的(搜索缓存键, 页码)
+        self._aliases: dict[tuple[str, int], tuple[str, int]] = {}
+        # 实际的(搜索缓存键, 页码) -> 指向它的别名
+        self._alias_keys: dict[tuple[str, int], set[tuple[str, int]]] = {}
+
+    def _resolve(self, search_key: str, page: int) -> tuple[str, int]:
+        key = (search_key, page)
+        return self._aliases.get(key, key)
+
+    def get(self, search_key: str, page: int) -> RenderedPage | None:
+        key = self._resolve(search_key, page)
+        cached = self._data.get(key)
+        if cached is None:
+            return None
+        expire_at, rendered = cached
+        if time.monotonic() > expire_at:
+            self._remove(key)
+            return None
+        self._data.move_to_end(key)
+        if rendered.prefetched and not rendered.used:
+            rendered.used = True
+            prefetch_stats.hits += 1
+        return rendered
+
+    def contains(self, search_key: str, page: int) -> bool:
+        """
+        是否存在未过期的缓存, 不影响淘汰顺序和预取统计
+        """
+        cached = self._data.get(self._resolve(search_key, page))
+        return cached is not None and time.monotonic() <= cached[0]
+
+    def set(self, search_key: str, page: int, rendered: RenderedPage, alias: int | None = None):
+        """
+        保存渲染结果
+        :param page: 实际页码
+        :param alias: 请求的页码(可选), 与实际页码不同时指向同一条缓存
+        """
+        key = (search_key, page)
+        if len(rendered.image) > self.max_bytes:
+            return
+        self.purge_expired()
+        self._remove(key)
+        self._remove_alias(key)
+        self._data[key] = (time.monotonic() + self.ttl, rendered)
+        self.total_bytes += len(rendered.image)
+        if alias is not None and alias != page:
+            alias_key = (search_key, alias)
+            self._remove(alias_key)
+            self._remove_alias(alias_key)
+            self._aliases[alias_key] = key
+            self._alias_keys.setdefault(key, set()).add(alias_key)
+        while self.total_bytes > self.max_bytes:
+            self._remove(next(iter(self._data)))
+
+    def purge_expired(self):
+        """
+        清除所有过期的结果, 未被使用的预取结果计为浪费
+        """
+        now = time.monotonic()
+        expired = [key for key, (expire_at, _) in self._data.items() if now > expire_at]
+        for key in expired:
+            self._remove(key)
+
+    def _remove_alias(self, alias_key: tuple[str, int]):
+        key = self._aliases.pop(alias_key, None)
+        if key is not None:
+            alias_keys = self._alias_keys.get(key)
+            alias_keys.discard(alias_key)
+            if not alias_keys:
+                del self._alias_keys[key]
+
+    def _remove(self, key: tuple[str, int]):
+        cached = self._data.pop(key, None)
+        if cached is not None:
+            rendered = cached[1]
+            self.total_bytes -= len(rendered.image)
+            if rendered.prefetched and not rendered.used:
+                prefetch_stats.wasted += 1
+        for alias_key in self._alias_keys.pop(key, ()):
+            del self._aliases[alias_key]
+
+
+rendered_page_cache = RenderedPageCache(RENDER_CACHE_TTL, RENDER_CACHE_MAX_BYTES)
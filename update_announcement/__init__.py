@@ -254,14 +254,17 @@ def create_dynamic_table_image(
     header_line_height = header_font.getbbox("A")[3]
 
     # 计算列宽
+    # 每行文字只测量一次, 绘制时复用
+    line_widths = []
     col_widths = [0] * len(headers)
-    for row in table_data:
+    for row_index, row in enumerate(table_data):
+        current_font = header_font if row_index == 0 else font
+        row_widths = []
         for i, cell_lines in enumerate(row):
-            current_font = header_font if table_data.index(row) == 0 else font
-            for line in cell_lines:
-                line_width = current_font.getbbox(line)[2]
-                if line_width > col_widths[i]:
-                    col_widths[i] = line_width
+            cell_widths = [current_font.getbbox(line)[2] for line in cell_lines]
+            row_widths.append(cell_widths)
+            col_widths[i] = max([col_widths[i], *cell_widths])
+        line_widths.append(row_widths)
     col_widths = [w + 2 * cell_padding for w in col_widths]
 
     # 计算行高
@@ -313,8 +316,7 @@ def create_dynamic_table_image(
             text_y_start = y_offset + (current_row_height - total_text_height) / 2
 
             for k, line in enumerate(cell_lines):
-                line_bbox = current_font.getbbox(line)
-                text_x = x_offset + (current_col_width - line_bbox[2]) / 2
+                text_x = x_offset + (current_col_width - line_widths[i][j][k]) / 2
                 text_y = text_y_start + k * current_line_height
                 draw.text((text_x, text_y), line, font=current_font, fill=text_color)
             x_offset += current_col_width